@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Job queue throughput benchmark.
+
+Seeds application.worker_jobs with synthetic jobs, runs several
+ProcessWorkerJobsCommand workers against them in separate processes and
+reports claim latency, throughput and duplicate claims.
+
+Only run this against a local throwaway database. With --setup the queue
+table is created if it does not exist and sql/queue/create_worker_queue.sql is
+applied. Benchmark jobs are deleted afterwards unless --keep is given.
+
+Examples:
+    ```bash
+    python -m benchmarks.queue_throughput --db-name bench --setup \\
+        --jobs 20000 --workers 4 --max-concurrent 16 --listen
+    ```
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import statistics
+import time
+from collections import Counter
+from pathlib import Path
+
+from fundermapsworker import FunderMapsWorker
+from fundermapsworker.command import WorkerCommand
+from fundermapsworker.config import DatabaseConfig
+from fundermapsworker.providers.queue import LEASE_DURATION
+from fundermapsworker.registry import JobHandler, PayloadField
+from process_worker_jobs import ProcessWorkerJobsCommand
+
+QUEUE_SQL = Path(__file__).resolve().parent.parent / "sql/queue/create_worker_queue.sql"
+
+# Minimal queue table, as far as the worker relies on it
+CREATE_QUEUE_TABLE = """
+    CREATE SCHEMA IF NOT EXISTS application;
+    CREATE TABLE IF NOT EXISTS application.worker_jobs (
+        id bigint GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+        job_type text NOT NULL,
+        payload jsonb NOT NULL DEFAULT '{}',
+        status text NOT NULL DEFAULT 'pending',
+        priority integer NOT NULL DEFAULT 0,
+        retry_count integer NOT NULL DEFAULT 0,
+        max_retries integer NOT NULL DEFAULT 3,
+        last_error text,
+        process_after timestamptz,
+        created_at timestamptz NOT NULL DEFAULT NOW(),
+        updated_at timestamptz NOT NULL DEFAULT NOW()
+    );
+"""
+
+NOOP_JOB = "bench_noop"
+SLEEP_JOB = "bench_sleep"
+
+
+class NoopCommand(WorkerCommand):
+    """Job that does nothing, measuring pure queue overhead."""
+
+    def __init__(self):
+        super().__init__(description="Benchmark job that does nothing")
+
+    async def execute(self):
+        return 0
+
+
+class SleepCommand(WorkerCommand):
+    """Job that sleeps, standing in for I/O bound work."""
+
+    def __init__(self):
+        super().__init__(description="Benchmark job that sleeps")
+
+    async def execute(self):
+        await asyncio.sleep(self.args.seconds)
+        return 0
+
+
+BENCH_HANDLERS = (
+    JobHandler(job_type=NOOP_JOB, command=f"{__name__}:NoopCommand"),
+    JobHandler(
+        job_type=SLEEP_JOB,
+        command=f"{__name__}:SleepCommand",
+        fields=(PayloadField("seconds", default=0.0, convert=float),),
+    ),
+)
+
+
+def _percentiles(values: list[float]) -> str:
+    if len(values) < 2:
+        return "n/a"
+    q = statistics.quantiles(values, n=100)
+    return (
+        f"p50 {q[49] * 1000:.1f} ms, p95 {q[94] * 1000:.1f} ms,"
+        f" p99 {q[98] * 1000:.1f} ms, max {max(values) * 1000:.1f} ms"
+    )
+
+
+async def _run_worker(
+    number: int, db_config: DatabaseConfig, options: dict, results
+) -> None:
+    """Run one worker until SIGTERM and report its claims."""
+    logger = logging.getLogger(f"bench.worker{number}")
+    fundermaps = FunderMapsWorker(db_config=db_config, logger=logger)
+
+    command = ProcessWorkerJobsCommand()
+    command.fundermaps = fundermaps
+    command.logger = logger
+    command.args = argparse.Namespace(
+        poll_interval=options["poll_interval"],
+        listen=options["listen"],
+        job_types=[NOOP_JOB, SLEEP_JOB],
+        max_concurrent=options["max_concurrent"],
+        adaptive=False,
+        min_concurrent=1,
+        job_class=[],
+        run_once=False,
+        timeout=60,
+        lease_duration=LEASE_DURATION,
+        drain_timeout=30,
+        metrics_port=0,
+        metrics_host="127.0.0.1",
+    )
+
+    # Time every claim query and remember which jobs it returned
+    job_queue = fundermaps.queue
+    claim = job_queue.claim
+    claims: list[tuple[float, int]] = []
+    claimed: list[int] = []
+
+    def timed_claim(*args, **kwargs):
+        start = time.perf_counter()
+        jobs = claim(*args, **kwargs)
+        claims.append((time.perf_counter() - start, len(jobs)))
+        claimed.extend(job["id"] for job in jobs)
+        return jobs
+
+    job_queue.claim = timed_claim
+
+    try:
+        await command.pre_execute()
+        for handler in BENCH_HANDLERS:
+            command.registry.register(handler)
+        command.registry.load()
+
+        await command.execute()
+    finally:
+        await fundermaps.aclose()
+        results.put({"worker": number, "claims": claims, "claimed": claimed})
+
+
+def _worker_process(number: int, db_config: DatabaseConfig, options: dict, results):
+    logging.basicConfig(level=options["log_level"])
+    asyncio.run(_run_worker(number, db_config, options, results))
+
+
+class QueueThroughputBenchmark(WorkerCommand):
+    def __init__(self):
+        super().__init__(description="Benchmark job queue throughput")
+
+    def add_arguments(self, parser: argparse.ArgumentParser):
+        """Add command-line arguments for the command."""
+        parser.add_argument(
+            "--setup",
+            action="store_true",
+            help="Create the queue table if needed and apply the queue SQL",
+        )
+        parser.add_argument(
+            "--jobs", type=int, default=10000, help="Jobs to seed (default: 10000)"
+        )
+        parser.add_argument(
+            "--sleep-fraction",
+            type=float,
+            default=0.0,
+            help="Fraction of jobs that sleep instead of doing nothing (default: 0)",
+        )
+        parser.add_argument(
+            "--sleep-seconds",
+            type=float,
+            default=0.05,
+            help="Seconds a sleep job sleeps (default: 0.05)",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=4, help="Worker processes (default: 4)"
+        )
+        parser.add_argument(
+            "--max-concurrent",
+            type=int,
+            default=8,
+            help="Job slots per worker (default: 8)",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=int,
+            default=1,
+            help="Worker polling interval in seconds (default: 1)",
+        )
+        parser.add_argument(
+            "--listen",
+            action="store_true",
+            help="Let workers wake up on job notifications",
+        )
+        parser.add_argument(
+            "--max-duration",
+            type=float,
+            default=600,
+            help="Stop the workers after this many seconds (default: 600)",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the benchmark jobs and their runs afterwards",
+        )
+
+    def _setup(self) -> None:
+        self.logger.info("Creating the job queue")
+        with self.fundermaps.db as db, db.db.cursor() as cur:
+            cur.execute(CREATE_QUEUE_TABLE)
+            cur.execute(QUEUE_SQL.read_text())
+
+    def _seed(self) -> None:
+        with self.fundermaps.db as db, db.db.cursor() as cur:
+            cur.execute(
+                """
+                SELECT count(*)
+                FROM application.worker_jobs
+                WHERE job_type <> ALL(%s)
+                """,
+                ([NOOP_JOB, SLEEP_JOB],),
+            )
+            if cur.fetchone()[0]:
+                raise RuntimeError(
+                    "The queue holds jobs that are not benchmark jobs;"
+                    " use a throwaway database"
+                )
+
+            cur.execute(
+                "DELETE FROM application.worker_jobs WHERE job_type = ANY(%s)",
+                ([NOOP_JOB, SLEEP_JOB],),
+            )
+
+            # Unique payloads keep jobs from being coalesced
+            sleep_jobs = round(self.args.jobs * self.args.sleep_fraction)
+            cur.execute(
+                """
+                INSERT INTO application.worker_jobs (job_type, payload)
+                SELECT
+                    CASE WHEN n <= %(sleep_jobs)s THEN %(sleep)s ELSE %(noop)s END,
+                    jsonb_build_object('n', n, 'seconds', %(seconds)s)
+                FROM generate_series(1, %(jobs)s) AS n
+                """,
+                {
+                    "jobs": self.args.jobs,
+                    "sleep_jobs": sleep_jobs,
+                    "sleep": SLEEP_JOB,
+                    "noop": NOOP_JOB,
+                    "seconds": self.args.sleep_seconds,
+                },
+            )
+
+        self.logger.info(
+            f"Seeded {self.args.jobs} jobs, {sleep_jobs} sleeping"
+            f" {self.args.sleep_seconds}s"
+        )
+
+    def _progress(self) -> tuple[int, int]:
+        with self.fundermaps.db as db, db.db.cursor() as cur:
+            cur.execute(
+                """
+                SELECT
+                    count(*) FILTER (WHERE status = 'completed'),
+                    count(*) FILTER (WHERE status = 'failed')
+                FROM application.worker_jobs
+                WHERE job_type = ANY(%s)
+                """,
+                ([NOOP_JOB, SLEEP_JOB],),
+            )
+            return cur.fetchone()
+
+    def _run_stats(self) -> tuple[list[float], float | None]:
+        """Queue wait of every run and the seconds from seeding to the last finish."""
+        with self.fundermaps.db as db, db.db.cursor() as cur:
+            cur.execute(
+                """
+                SELECT queue_wait
+                FROM application.worker_job_runs
+                WHERE job_type = ANY(%s) AND queue_wait IS NOT NULL
+                """,
+                ([NOOP_JOB, SLEEP_JOB],),
+            )
+            waits = [row[0] for row in cur.fetchall()]
+
+            cur.execute(
+                """
+                SELECT EXTRACT(EPOCH FROM max(updated_at) - min(created_at))::float
+                FROM application.worker_jobs
+                WHERE job_type = ANY(%s) AND status = 'completed'
+                """,
+                ([NOOP_JOB, SLEEP_JOB],),
+            )
+            return waits, cur.fetchone()[0]
+
+    def _cleanup(self) -> None:
+        with self.fundermaps.db as db, db.db.cursor() as cur:
+            cur.execute(
+                "DELETE FROM application.worker_jobs WHERE job_type = ANY(%s)",
+                ([NOOP_JOB, SLEEP_JOB],),
+            )
+
+    def _report(self, results: list[dict], elapsed: float) -> None:
+        claim_latency = [latency for r in results for latency, _ in r["claims"]]
+        empty_claims = sum(1 for r in results for _, count in r["claims"] if not count)
+        claimed = Counter(job_id for r in results for job_id in r["claimed"])
+        duplicates = sum(count - 1 for count in claimed.values())
+
+        completed, failed = self._progress()
+        queue_wait, makespan = self._run_stats()
+
+        self.logger.info(
+            f"Workers: {self.args.workers} x {self.args.max_concurrent} slots,"
+            f" {'listening' if self.args.listen else 'polling'}"
+        )
+        self.logger.info(
+            f"Jobs: {completed} completed, {failed} failed of {self.args.jobs}"
+            f" in {elapsed:.1f}s"
+        )
+        if makespan:
+            self.logger.info(f"Throughput: {completed / makespan:.1f} jobs/s")
+        self.logger.info(
+            f"Claim queries: {len(claim_latency)}, {empty_claims} empty,"
+            f" {_percentiles(claim_latency)}"
+        )
+        self.logger.info(f"Queue wait: {_percentiles(queue_wait)}")
+
+        if duplicates:
+            self.logger.error(f"Duplicate claims: {duplicates}")
+        else:
+            self.logger.info("Duplicate claims: 0")
+
+    async def execute(self):
+        """Execute the queue throughput benchmark."""
+        if self.args.setup:
+            await self.run_blocking(self._setup)
+        await self.run_blocking(self._seed)
+
+        # Spawn rather than fork, so workers never share our connections
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        options = {
+            "poll_interval": self.args.poll_interval,
+            "listen": self.args.listen,
+            "max_concurrent": self.args.max_concurrent,
+            "log_level": logging.WARNING,
+        }
+        db_config = dataclasses.replace(self.fundermaps.db_config, pool_size=0)
+
+        start = time.monotonic()
+        workers = [
+            context.Process(
+                target=_worker_process, args=(n, db_config, options, results)
+            )
+            for n in range(self.args.workers)
+        ]
+        for worker in workers:
+            worker.start()
+
+        try:
+            while time.monotonic() - start < self.args.max_duration:
+                completed, failed = await self.run_blocking(self._progress)
+                if completed + failed >= self.args.jobs:
+                    break
+                await asyncio.sleep(0.1)
+            else:
+                self.logger.warning(
+                    f"Stopping after {self.args.max_duration}s with jobs left"
+                )
+            elapsed = time.monotonic() - start
+        finally:
+            # Workers drain and release their jobs on SIGTERM
+            for worker in workers:
+                if worker.is_alive():
+                    os.kill(worker.pid, signal.SIGTERM)
+
+        # Workers write their job runs before reporting their claims
+        collected = []
+        for _ in workers:
+            try:
+                collected.append(await asyncio.to_thread(results.get, timeout=60))
+            except queue.Empty:
+                self.logger.error("A worker exited without reporting its claims")
+                break
+        for worker in workers:
+            worker.join()
+
+        await self.run_blocking(self._report, collected, elapsed)
+
+        if not self.args.keep:
+            await self.run_blocking(self._cleanup)
+        return 0
+
+
+if __name__ == "__main__":
+    exit_code = asyncio.run(QueueThroughputBenchmark().run())
+    exit(exit_code)
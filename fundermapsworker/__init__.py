@@ -1,12 +1,18 @@
+import asyncio
+import contextvars
+import functools
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 
 from fundermapsworker.config import DatabaseConfig, MailConfig, PDFCoConfig, S3Config
+from fundermapsworker.providers.adb import AsyncDbProvider
 from fundermapsworker.providers.db import DbProvider
 from fundermapsworker.providers.gdal import GDALProvider
 from fundermapsworker.providers.mail import MailProvider
 from fundermapsworker.providers.pdf import PDFProvider
+from fundermapsworker.providers.queue import JobQueueProvider
 from fundermapsworker.providers.storage import ObjectStorageProvider
 
 logger = logging.getLogger(__name__)
@@ -15,8 +21,12 @@ logger = logging.getLogger(__name__)
 class FunderMapsWorker:
     """Main entry point for the FunderMaps worker.
 
-    Provides lazy-initialized access to service providers: database, GDAL,
-    object storage, email, and PDF generation.
+    Provides lazy-initialized access to service providers: database (blocking
+    and asyncio), GDAL, object storage, email, PDF generation, and the worker
+    job queue.
+
+    Blocking calls (psycopg2, boto3, Mailgun) can be moved off the event loop
+    with `run_blocking`, which runs them in a shared thread pool.
     """
 
     db_config: DatabaseConfig | None
@@ -42,8 +52,17 @@ class FunderMapsWorker:
         self._service_providers: dict[str, Any] = {}
         self._logger: logging.Logger = kwargs.get("logger", logger)
 
+        self.executor_workers: int | None = kwargs.get("executor_workers")
+        self._executor: ThreadPoolExecutor | None = None
+        self._abandon_blocking = False
+
         self._provider_configs = {
             "db": (DbProvider, self.db_config, "Database configuration is not set"),
+            "adb": (
+                AsyncDbProvider,
+                self.db_config,
+                "Database configuration is not set",
+            ),
             "gdal": (GDALProvider, self.db_config, "Database configuration is not set"),
             "s3": (
                 ObjectStorageProvider,
@@ -52,6 +71,11 @@ class FunderMapsWorker:
             ),
             "mail": (MailProvider, self.mail_config, "Mail configuration is not set"),
             "pdf": (PDFProvider, self.pdf_config, "PDF configuration is not set"),
+            "queue": (
+                JobQueueProvider,
+                self.db_config,
+                "Database configuration is not set",
+            ),
         }
 
     def _get_provider(self, provider_key: str) -> Any:
@@ -69,10 +93,75 @@ class FunderMapsWorker:
 
         return self._service_providers[provider_key]
 
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """The thread pool used by `run_blocking`, created on first use."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.executor_workers, thread_name_prefix="fundermaps"
+            )
+            self._logger.debug("Thread pool executor initialized")
+        return self._executor
+
+    async def run_blocking(self, func, *args, **kwargs) -> Any:
+        """
+        Run a synchronous function in the thread pool and await its result.
+
+        The function runs in a copy of the caller's context, so context
+        variables such as the current database session stack stay isolated
+        per job.
+        """
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, functools.partial(context.run, func, *args, **kwargs)
+        )
+
+    def abandon_blocking(self) -> None:
+        """
+        Stop waiting for blocking stages that are still running.
+
+        Cancelling a job does not stop a `run_blocking` stage that already runs
+        in a thread. After this call, `close` no longer waits for those
+        stages. The interpreter still joins the threads on a normal exit, so
+        the caller should end the process with os._exit once `close` returns.
+        """
+        self._abandon_blocking = True
+
+    @property
+    def blocking_abandoned(self) -> bool:
+        """Whether `abandon_blocking` was called."""
+        return self._abandon_blocking
+
+    def close(self) -> None:
+        """Release resources held by initialized providers, such as pooled connections."""
+        if self._executor is not None:
+            self._executor.shutdown(
+                wait=not self._abandon_blocking, cancel_futures=True
+            )
+            self._executor = None
+
+        for provider in self._service_providers.values():
+            close = getattr(provider, "close", None)
+            if callable(close):
+                close()
+
+    async def aclose(self) -> None:
+        """Release resources held by initialized providers, including async ones."""
+        for provider in self._service_providers.values():
+            aclose = getattr(provider, "aclose", None)
+            if callable(aclose):
+                await aclose()
+
+        self.close()
+
     @property
     def db(self) -> DbProvider:
         return self._get_provider("db")
 
+    @property
+    def adb(self) -> AsyncDbProvider:
+        return self._get_provider("adb")
+
     @property
     def gdal(self) -> GDALProvider:
         return self._get_provider("gdal")
@@ -89,6 +178,10 @@ class FunderMapsWorker:
     def pdf(self) -> PDFProvider:
         return self._get_provider("pdf")
 
+    @property
+    def queue(self) -> JobQueueProvider:
+        return self._get_provider("queue")
+
 
 # Backwards compatibility alias
 FunderMapsSDK = FunderMapsWorker
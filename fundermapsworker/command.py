@@ -1,4 +1,5 @@
 import argparse
+import functools
 import logging
 import os
 import time
@@ -11,6 +12,33 @@ from fundermapsworker import FunderMapsWorker
 from fundermapsworker.config import DatabaseConfig, MailConfig, PDFCoConfig, S3Config
 
 
+def blocking(func):
+    """Turn a synchronous command method into an awaitable executor stage.
+
+    Awaiting the decorated method runs it in the worker's thread pool, so
+    blocking database, storage and mail calls do not freeze the event loop
+    for other jobs running in the same worker.
+
+    Examples:
+        ```python
+        @blocking
+        def _refresh_views(self) -> bool:
+            with self.fundermaps.db as db:
+                db.refresh_materialized_view("data.building_sample")
+            return True
+
+        async def execute(self):
+            await self._refresh_views()
+        ```
+    """
+
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        return await self.fundermaps.run_blocking(func, self, *args, **kwargs)
+
+    return wrapper
+
+
 class WorkerCommand:
     """Base class for FunderMaps CLI commands."""
 
@@ -67,6 +95,24 @@ class WorkerCommand:
             default=int(os.environ.get("FUNDERMAPS_DB_PORT", "5432")),
             help="Database port (env: FUNDERMAPS_DB_PORT)",
         )
+        db_group.add_argument(
+            "--db-pool-size",
+            type=int,
+            default=int(os.environ.get("FUNDERMAPS_DB_POOL_SIZE", "0")),
+            help="Maximum pooled database connections, 0 disables pooling (env: FUNDERMAPS_DB_POOL_SIZE)",
+        )
+        db_group.add_argument(
+            "--db-pool-max-lifetime",
+            type=float,
+            default=float(os.environ.get("FUNDERMAPS_DB_POOL_MAX_LIFETIME", "1800")),
+            help="Seconds before a pooled connection is recycled (env: FUNDERMAPS_DB_POOL_MAX_LIFETIME)",
+        )
+        db_group.add_argument(
+            "--db-pool-timeout",
+            type=float,
+            default=float(os.environ.get("FUNDERMAPS_DB_POOL_TIMEOUT", "30")),
+            help="Seconds to wait for a free pooled connection (env: FUNDERMAPS_DB_POOL_TIMEOUT)",
+        )
 
         s3_group = parser.add_argument_group("S3 Configuration")
         s3_group.add_argument(
@@ -225,6 +271,9 @@ class WorkerCommand:
             user=self.args.db_user,
             password=self.args.db_password,
             port=self.args.db_port,
+            pool_size=self.args.db_pool_size,
+            pool_max_lifetime=self.args.db_pool_max_lifetime,
+            pool_timeout=self.args.db_pool_timeout,
         )
 
         s3_config = S3Config(
@@ -254,6 +303,10 @@ class WorkerCommand:
             logger=self.logger,
         )
 
+    async def run_blocking(self, func, *args, **kwargs):
+        """Run a synchronous callable in the worker's thread pool and await it."""
+        return await self.fundermaps.run_blocking(func, *args, **kwargs)
+
     async def execute(self) -> None:
         """Execute the command. Must be implemented by subclasses."""
         raise NotImplementedError("Subclasses must implement execute()")
@@ -321,3 +374,4 @@ class WorkerCommand:
         finally:
             await self.post_execute(success)
             await self._complete_job()
+            await self.fundermaps.aclose()
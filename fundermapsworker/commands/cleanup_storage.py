@@ -1,41 +1,29 @@
 import asyncio
 
-from fundermapsworker.command import WorkerCommand
+from fundermapsworker.command import WorkerCommand, blocking
 
 
 class CleanupStorageCommand(WorkerCommand):
     def __init__(self):
         super().__init__(description="Clean up orphaned file resources")
 
-    async def execute(self):
-        """Execute the storage cleanup command."""
+    @blocking
+    def _cleanup(self) -> int:
+        """Delete orphaned files from S3 and the database."""
 
         deleted_count = 0
         failed_count = 0
         with self.fundermaps.db as db, db.db.cursor() as cur:
-            query = """SELECT * FROM application.file_resources_orphaned"""
-            cur.execute(query)
-
-            # Get column names from cursor description
-            column_names = [desc[0] for desc in cur.description]
-            # Find indices for the columns we need
-            id_idx = column_names.index("id")
-            key_idx = column_names.index("key")
-            filename_idx = column_names.index("original_filename")
-
-            orphaned_files = cur.fetchall()
-
-            if not orphaned_files:
-                self.logger.info("No orphaned files found")
-                return 0
+            query = """
+                SELECT id, key, original_filename
+                FROM application.file_resources_orphaned"""
 
-            self.logger.info(f"Found {len(orphaned_files)} orphaned files")
+            # Stream the orphaned files instead of loading them all at once;
+            # the result is not affected by the deletes below
+            orphaned_files = db.stream(query)
 
             with self.fundermaps.s3 as s3:
-                for file in orphaned_files:
-                    file_id = file[id_idx]
-                    file_key = file[key_idx]
-                    file_name = file[filename_idx]
+                for file_id, file_key, file_name in orphaned_files:
                     s3_path = f"user-data/{file_key}/{file_name}"
 
                     try:
@@ -51,6 +39,10 @@ class CleanupStorageCommand(WorkerCommand):
                         self.logger.error(f"Failed to delete {s3_path}: {str(e)}")
                         failed_count += 1
 
+            if not deleted_count and not failed_count:
+                self.logger.info("No orphaned files found")
+                return 0
+
             # Commit the database changes
             db.db.commit()
 
@@ -60,6 +52,11 @@ class CleanupStorageCommand(WorkerCommand):
         )
         return 0 if failed_count == 0 else 1
 
+    async def execute(self):
+        """Execute the storage cleanup command."""
+
+        return await self._cleanup()
+
 
 if __name__ == "__main__":
     exit_code = asyncio.run(CleanupStorageCommand().run())
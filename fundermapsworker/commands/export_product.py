@@ -1,9 +1,8 @@
 import asyncio
-import csv
 from datetime import datetime
-from pathlib import Path
 
-from fundermapsworker.command import WorkerCommand
+from fundermapsworker import telemetry
+from fundermapsworker.command import WorkerCommand, blocking
 
 # TODO: Get from the database
 ORGANIZATIONS: list[str] = [
@@ -31,11 +30,12 @@ class ProductExportCommand(WorkerCommand):
             help="Reference date for export in YYYY-MM-DD format (defaults to current date)",
         )
 
-    async def process_export(self, organization: str, reference_date: datetime):
+    @blocking
+    def process_export(self, organization: str, reference_date: datetime):
         """Process export for a specific organization."""
         self.logger.info("Exporting product tracker data")
 
-        with self.fundermaps.db as db, db.db.cursor() as cur:
+        with telemetry.stage(f"export {organization}"), self.fundermaps.db as db:
             query = """
                 SELECT
                         pt.organization_id,
@@ -50,26 +50,16 @@ class ProductExportCommand(WorkerCommand):
                 AND     pt.create_date >= date_trunc('month', %s) - interval '1 month'
                 AND     pt.create_date < date_trunc('month', %s)"""
 
-            cur.execute(query, (organization, reference_date, reference_date))
-
             csv_file = f"{organization}.csv"
 
-            # TODO: Maybe create a CSV writer helper function in the SDK
-            column_names = [desc[0] for desc in cur.description]
-
             self.logger.info(f"Writing data to {csv_file}")
-            with Path(csv_file).open(mode="w", newline="") as file:
-                writer = csv.writer(file)
-
-                writer.writerow(column_names)
-
-                data_written = False
-                for row in cur:
-                    writer.writerow(row)
-                    data_written = True
+            rows = db.copy_out(
+                query, csv_file, params=(organization, reference_date, reference_date)
+            )
+            data_written = rows > 0
 
         if data_written:
-            with self.fundermaps.s3 as s3:
+            with telemetry.stage(f"upload {organization}"), self.fundermaps.s3 as s3:
                 formatted_date_year = reference_date.strftime("%Y")
                 formatted_date_month = reference_date.strftime("%b").lower()
 
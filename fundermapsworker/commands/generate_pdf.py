@@ -5,7 +5,8 @@ import asyncio
 import time
 from pathlib import Path
 
-from fundermapsworker.command import WorkerCommand
+from fundermapsworker import telemetry
+from fundermapsworker.command import WorkerCommand, blocking
 
 
 class PDFGenerateCommand(WorkerCommand):
@@ -56,7 +57,8 @@ class PDFGenerateCommand(WorkerCommand):
 
         try:
             # Generate PDF using the SDK
-            result = await self.fundermaps.pdf.generate_pdf(url, output_name)
+            with telemetry.stage("generate"):
+                result = await self.fundermaps.pdf.generate_pdf(url, output_name)
 
             if result.get("error"):
                 self.logger.error(
@@ -69,8 +71,10 @@ class PDFGenerateCommand(WorkerCommand):
                 pdf_url = result["url"]
                 self.logger.info("PDF generated successfully")
 
-                await self._download_pdf(pdf_url, output_name)
-                self._upload_pdf(output_name)
+                with telemetry.stage("download"):
+                    await self._download_pdf(pdf_url, output_name)
+                with telemetry.stage("upload"):
+                    await self._upload_pdf(output_name)
 
             elapsed = time.time() - start_time
             self.logger.info(f"PDF generation completed in {elapsed:.2f}s")
@@ -99,6 +103,7 @@ class PDFGenerateCommand(WorkerCommand):
 
                 with output_path.open("wb") as f:
                     f.write(response.content)
+                telemetry.record_bytes(len(response.content))
 
                 self.logger.info(f"PDF downloaded successfully: {output_path}")
                 return True
@@ -107,6 +112,7 @@ class PDFGenerateCommand(WorkerCommand):
             self.logger.error(f"Failed to download PDF: {e}", exc_info=True)
             return False
 
+    @blocking
     def _upload_pdf(self, output_name: str) -> bool:
         try:
             self.logger.info(f"Uploading {output_name}.pdf to S3")
@@ -4,7 +4,7 @@ import contextlib
 import tempfile
 from pathlib import Path
 
-from fundermapsworker import util
+from fundermapsworker import telemetry, util
 from fundermapsworker.command import WorkerCommand
 
 
@@ -78,7 +78,8 @@ class LoadDatasetCommand(WorkerCommand):
             ):
                 self.logger.info(f"Downloading dataset from URL '{dataset_input}'")
                 try:
-                    await util.http_download_file(dataset_input, local_file_path)
+                    with telemetry.stage("download"):
+                        await util.http_download_file(dataset_input, local_file_path)
                 except Exception as e:
                     self.logger.error(
                         f"Failed to download file from URL: {e}", exc_info=True
@@ -89,8 +90,10 @@ class LoadDatasetCommand(WorkerCommand):
                 self.logger.info(f"Downloading dataset from S3 '{dataset_input}'")
                 try:
                     s3_path = dataset_input.replace("s3://", "")
-                    with self.fundermaps.s3 as s3:
-                        s3.download_file(local_file_path, s3_path)
+                    with telemetry.stage("download"), self.fundermaps.s3 as s3:
+                        await self.run_blocking(
+                            s3.download_file, local_file_path, s3_path
+                        )
                 except Exception as e:
                     self.logger.error(
                         f"Failed to download file from S3: {e}", exc_info=True
@@ -118,7 +121,10 @@ class LoadDatasetCommand(WorkerCommand):
             # Load the dataset into PostGIS
             self.logger.info(f"Loading dataset into database from {local_file_path}")
             try:
-                await self.fundermaps.gdal.to_postgis(local_file_path, *(dataset_layer or []))
+                with telemetry.stage("load"):
+                    await self.fundermaps.gdal.to_postgis(
+                        local_file_path, *(dataset_layer or [])
+                    )
                 success = True
             except Exception as e:
                 self.logger.error(
@@ -132,7 +138,7 @@ class LoadDatasetCommand(WorkerCommand):
                     self.logger.info(f"Deleting dataset from S3 '{dataset_input}'")
                     s3_path = dataset_input.replace("s3://", "")
                     with self.fundermaps.s3 as s3:
-                        s3.delete_file(s3_path)
+                        await self.run_blocking(s3.delete_file, s3_path)
                 except Exception as e:
                     self.logger.warning(f"Failed to delete S3 file: {e}")
                     # Not critical if deletion fails
@@ -6,8 +6,9 @@ import time
 from dataclasses import dataclass, field
 from pathlib import Path
 
-from fundermapsworker import util
-from fundermapsworker.command import WorkerCommand
+from fundermapsworker import telemetry, util
+from fundermapsworker.command import WorkerCommand, blocking
+from fundermapsworker.load import HostLoadController, adaptive_default
 from fundermapsworker.providers.tippecanoe import tippecanoe
 
 
@@ -59,7 +60,9 @@ class ProcessMapsetCommand(WorkerCommand):
         for attempt in range(1, MAX_RETRIES + 1):
             try:
                 maplayer = context.tileset.table_name()
-                await self.fundermaps.gdal.from_postgis(output_file, maplayer)
+                with telemetry.stage(f"download {context.tileset.tileset}"):
+                    await self.fundermaps.gdal.from_postgis(output_file, maplayer)
+                    telemetry.record_bytes(output_file.stat().st_size)
                 return True
             except Exception as e:
                 if attempt < MAX_RETRIES:
@@ -84,19 +87,21 @@ class ProcessMapsetCommand(WorkerCommand):
             self.logger.info(
                 f"Converting tileset '{context.tileset.tileset}' to GeoJSON"
             )
-            await self.fundermaps.gdal.ogr2ogr(
-                Path(context.work_dir) / f"{context.tileset.tileset}.gpkg",
-                Path(context.work_dir) / f"{context.tileset.tileset}.geojson",
-            )
+            with telemetry.stage(f"convert {context.tileset.tileset}"):
+                await self.fundermaps.gdal.ogr2ogr(
+                    Path(context.work_dir) / f"{context.tileset.tileset}.gpkg",
+                    Path(context.work_dir) / f"{context.tileset.tileset}.geojson",
+                )
 
             self.logger.info(f"Generating tileset '{context.tileset.tileset}'")
-            await tippecanoe(
-                Path(context.work_dir) / f"{context.tileset.tileset}.geojson",
-                Path(context.work_dir) / context.tileset.tileset,
-                context.tileset.tileset,
-                context.tileset.max_zoom,
-                context.tileset.min_zoom,
-            )
+            with telemetry.stage(f"tippecanoe {context.tileset.tileset}"):
+                await tippecanoe(
+                    Path(context.work_dir) / f"{context.tileset.tileset}.geojson",
+                    Path(context.work_dir) / context.tileset.tileset,
+                    context.tileset.tileset,
+                    context.tileset.max_zoom,
+                    context.tileset.min_zoom,
+                )
             return True
         except Exception as e:
             self.logger.error(
@@ -105,6 +110,7 @@ class ProcessMapsetCommand(WorkerCommand):
             context.tileset.errors.append(f"Tileset generation failed: {str(e)}")
             return False
 
+    @blocking
     def _upload_dataset(
         self,
         context: JobContext,
@@ -112,7 +118,10 @@ class ProcessMapsetCommand(WorkerCommand):
         try:
             self.logger.info(f"Uploading {context.tileset.tileset} to S3")
 
-            with self.fundermaps.s3 as s3:
+            with (
+                telemetry.stage(f"upload dataset {context.tileset.tileset}"),
+                self.fundermaps.s3 as s3,
+            ):
                 s3_path = f"mapset/{util.date_path()}/{context.tileset.tileset}.gpkg"
                 s3.upload_file(
                     Path(context.work_dir) / f"{context.tileset.tileset}.gpkg",
@@ -127,7 +136,8 @@ class ProcessMapsetCommand(WorkerCommand):
             context.tileset.errors.append(f"Dataset upload failed: {str(e)}")
             return False
 
-    async def _upload_tiles(self, tileset: TileBundle, tileset_dir: str) -> bool:
+    @blocking
+    def _upload_tiles(self, tileset: TileBundle, tileset_dir: str) -> bool:
         """Upload generated tiles to S3."""
         try:
             self.logger.info(f"Uploading tiles for {tileset.tileset} to S3")
@@ -144,7 +154,7 @@ class ProcessMapsetCommand(WorkerCommand):
                     except OSError as e:
                         self.logger.warning(f"Failed to remove file {file_path}: {e}")
 
-            with self.fundermaps.s3 as s3:
+            with telemetry.stage(f"upload {tileset.tileset}"), self.fundermaps.s3 as s3:
                 tile_headers = {
                     "CacheControl": TILE_CACHE,
                     "ContentType": "application/x-protobuf",
@@ -177,7 +187,7 @@ class ProcessMapsetCommand(WorkerCommand):
                 tileset.processing_time = time.time() - start_time
                 return success
 
-            if tileset.upload_dataset and not self._upload_dataset(ctx):
+            if tileset.upload_dataset and not await self._upload_dataset(ctx):
                 success = False
 
             if tileset.generate_tiles and success:
@@ -204,20 +214,38 @@ class ProcessMapsetCommand(WorkerCommand):
         self, tilebundles: list[TileBundle]
     ) -> list[TileBundle]:
         max_workers = self.args.max_workers
-        self.logger.info(
-            f"Processing {len(tilebundles)} tilesets concurrently with {max_workers} workers"
+        min_workers = min(self.args.min_workers, max_workers)
+
+        # Without --adaptive the bounds are equal and the limit never changes
+        controller = HostLoadController(
+            min_workers if self.args.adaptive else max_workers, max_workers
         )
+        controller.logger = self.logger
 
-        semaphore = asyncio.Semaphore(max_workers)
+        sampler = None
+        if self.args.adaptive:
+            sampler = asyncio.create_task(controller.run())
+            self.logger.info(
+                f"Processing {len(tilebundles)} tilesets concurrently with"
+                f" {min_workers} to {max_workers} workers, adapting to host load"
+            )
+        else:
+            self.logger.info(
+                f"Processing {len(tilebundles)} tilesets concurrently with {max_workers} workers"
+            )
 
         async def bounded_process(tileset):
-            async with semaphore:
+            async with controller.slot():
                 return await self._process_mapset(tileset)
 
         random.shuffle(tilebundles)
 
         tasks = [bounded_process(tileset) for tileset in tilebundles]
-        await asyncio.gather(*tasks)
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            if sampler is not None:
+                sampler.cancel()
 
         return tilebundles
 
@@ -234,22 +262,76 @@ class ProcessMapsetCommand(WorkerCommand):
             default=3,
             help="Maximum number of worker threads when using concurrent mode",
         )
+        parser.add_argument(
+            "--adaptive",
+            action=argparse.BooleanOptionalAction,
+            default=adaptive_default(),
+            help="Adjust the number of tilesets processed at once between"
+            " --min-workers and --max-workers to the host load"
+            " (default: FUNDERMAPS_ADAPTIVE)",
+        )
+        parser.add_argument(
+            "--min-workers",
+            type=int,
+            default=1,
+            help="Minimum number of tilesets processed at once with --adaptive",
+        )
 
-    async def execute(self):
-        """Execute the process mapset command."""
-        try:
-            tilebundles = []
+    @blocking
+    def _fetch_tilebundles(self) -> list[TileBundle]:
+        """Fetch the enabled tilesets to process from the database."""
+        tilebundles = []
 
-            with self.fundermaps.db as db:
-                if self.args.tileset:
-                    requested_tilesets = set(self.args.tileset)
-                    self.logger.info(
-                        f"Fetching specific tilesets from database: {', '.join(requested_tilesets)}"
-                    )
+        with self.fundermaps.db as db:
+            if self.args.tileset:
+                requested_tilesets = set(self.args.tileset)
+                self.logger.info(
+                    f"Fetching specific tilesets from database: {', '.join(requested_tilesets)}"
+                )
 
-                    # Build a parameterized query to fetch only the requested tilesets
-                    placeholders = ", ".join(["%s"] * len(requested_tilesets))
-                    query = f"""
+                # Build a parameterized query to fetch only the requested tilesets
+                placeholders = ", ".join(["%s"] * len(requested_tilesets))
+                query = f"""
+                    SELECT
+                        tileset,
+                        zoom_min_level,
+                        zoom_max_level,
+                        generate_tileset,
+                        upload_dataset
+                    FROM maplayer.bundle
+                    WHERE enabled = TRUE AND tileset IN ({placeholders})
+                """  # noqa: S608
+
+                with db.db.cursor() as cur:
+                    cur.execute(query, list(requested_tilesets))
+
+                    for row in cur.fetchall():
+                        (
+                            tileset,
+                            zoom_min_level,
+                            zoom_max_level,
+                            generate_tileset,
+                            upload_dataset,
+                        ) = row
+                        tilebundles.append(
+                            TileBundle(
+                                tileset=tileset,
+                                min_zoom=zoom_min_level,
+                                max_zoom=zoom_max_level,
+                                upload_dataset=upload_dataset,
+                                generate_tiles=generate_tileset,
+                            )
+                        )
+
+                    if not tilebundles:
+                        self.logger.warning("No matching tilesets found in database")
+                        return tilebundles
+
+                self.logger.info(f"Processing {len(tilebundles)} selected tilesets")
+            else:
+                self.logger.info("Fetching all tilesets from database")
+                with db.db.cursor() as cur:
+                    query = """
                         SELECT
                             tileset,
                             zoom_min_level,
@@ -257,70 +339,37 @@ class ProcessMapsetCommand(WorkerCommand):
                             generate_tileset,
                             upload_dataset
                         FROM maplayer.bundle
-                        WHERE enabled = TRUE AND tileset IN ({placeholders})
-                    """  # noqa: S608
-
-                    with db.db.cursor() as cur:
-                        cur.execute(query, list(requested_tilesets))
-
-                        for row in cur.fetchall():
-                            (
-                                tileset,
-                                zoom_min_level,
-                                zoom_max_level,
-                                generate_tileset,
-                                upload_dataset,
-                            ) = row
-                            tilebundles.append(
-                                TileBundle(
-                                    tileset=tileset,
-                                    min_zoom=zoom_min_level,
-                                    max_zoom=zoom_max_level,
-                                    upload_dataset=upload_dataset,
-                                    generate_tiles=generate_tileset,
-                                )
-                            )
+                        WHERE enabled = TRUE
+                    """
+                    cur.execute(query)
 
-                        if not tilebundles:
-                            self.logger.warning(
-                                "No matching tilesets found in database"
+                    for row in cur.fetchall():
+                        (
+                            tileset,
+                            zoom_min_level,
+                            zoom_max_level,
+                            generate_tileset,
+                            upload_dataset,
+                        ) = row
+                        tilebundles.append(
+                            TileBundle(
+                                tileset=tileset,
+                                min_zoom=zoom_min_level,
+                                max_zoom=zoom_max_level,
+                                upload_dataset=upload_dataset,
+                                generate_tiles=generate_tileset,
                             )
-                            return 1
+                        )
+                self.logger.info(f"Processing all {len(tilebundles)} tilesets")
 
-                    self.logger.info(f"Processing {len(tilebundles)} selected tilesets")
-                else:
-                    self.logger.info("Fetching all tilesets from database")
-                    with db.db.cursor() as cur:
-                        query = """
-                            SELECT
-                                tileset,
-                                zoom_min_level,
-                                zoom_max_level,
-                                generate_tileset,
-                                upload_dataset
-                            FROM maplayer.bundle
-                            WHERE enabled = TRUE
-                        """
-                        cur.execute(query)
-
-                        for row in cur.fetchall():
-                            (
-                                tileset,
-                                zoom_min_level,
-                                zoom_max_level,
-                                generate_tileset,
-                                upload_dataset,
-                            ) = row
-                            tilebundles.append(
-                                TileBundle(
-                                    tileset=tileset,
-                                    min_zoom=zoom_min_level,
-                                    max_zoom=zoom_max_level,
-                                    upload_dataset=upload_dataset,
-                                    generate_tiles=generate_tileset,
-                                )
-                            )
-                    self.logger.info(f"Processing all {len(tilebundles)} tilesets")
+        return tilebundles
+
+    async def execute(self):
+        """Execute the process mapset command."""
+        try:
+            tilebundles = await self._fetch_tilebundles()
+            if not tilebundles and self.args.tileset:
+                return 1
 
             results = await self._process_concurrent(tilebundles)
 
@@ -4,6 +4,7 @@ import argparse
 import asyncio
 import time
 
+from fundermapsworker import telemetry
 from fundermapsworker.command import WorkerCommand
 
 
@@ -24,26 +25,41 @@ class ModelRefreshCommand(WorkerCommand):
         parser.add_argument(
             "--view", type=str, help="Refresh only a specific materialized view"
         )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Refresh views even if their source tables did not change",
+        )
+        parser.add_argument(
+            "--parallel",
+            type=int,
+            default=1,
+            help="Number of statistics views refreshed at once, each on its own"
+            " connection (default: 1)",
+        )
 
-    def _db_calculate_risk(self) -> bool:
+    async def _db_calculate_risk(self) -> bool:
         self.logger.info("Starting risk calculation...")
         start_time = time.time()
         try:
-            with self.fundermaps.db as db:
-                self.logger.info("Refreshing building_sample view...")
-                db.refresh_materialized_view("data.building_sample")
+            adb = self.fundermaps.adb
 
-                self.logger.info("Refreshing cluster_sample view...")
-                db.refresh_materialized_view("data.cluster_sample")
+            # The risk model reads from the sample views, so it cannot run without them
+            for view in (
+                "data.building_sample",
+                "data.cluster_sample",
+                "data.supercluster_sample",
+            ):
+                if await self._refresh_view(view) == "failed":
+                    raise RuntimeError(f"Failed to refresh {view}")
 
-                self.logger.info("Refreshing supercluster_sample view...")
-                db.refresh_materialized_view("data.supercluster_sample")
+            self.logger.info("Executing risk model calculation...")
+            with telemetry.stage("call data.model_risk_manifest"):
+                await adb.call("data.model_risk_manifest")
 
-                self.logger.info("Executing risk model calculation...")
-                db.call("data.model_risk_manifest")
-
-                self.logger.info("Reindexing risk model table...")
-                db.reindex_table("data.model_risk_static")
+            self.logger.info("Reindexing risk model table...")
+            with telemetry.stage("reindex data.model_risk_static"):
+                await adb.reindex_table("data.model_risk_static")
 
             elapsed = time.time() - start_time
             self.logger.info(f"Risk calculation completed in {elapsed:.2f}s")
@@ -55,7 +71,7 @@ class ModelRefreshCommand(WorkerCommand):
             )
             return False
 
-    def _db_refresh_statistics(self, specific_view: str = None) -> bool:
+    async def _db_refresh_statistics(self, specific_view: str = None) -> bool:
         views = [
             "data.statistics_product_inquiries",
             "data.statistics_product_inquiry_municipality",
@@ -79,30 +95,31 @@ class ModelRefreshCommand(WorkerCommand):
                 return False
             views = [specific_view]
 
-        self.logger.info(f"Starting statistics refresh for {len(views)} views...")
+        parallel = max(1, getattr(self.args, "parallel", None) or 1)
+        self.logger.info(
+            f"Starting statistics refresh for {len(views)} views"
+            f" ({min(parallel, len(views))} at a time)..."
+        )
         start_time = time.time()
-        failure_count = 0
 
         try:
-            with self.fundermaps.db as db:
-                for view in views:
-                    view_start = time.time()
-                    try:
-                        self.logger.info(f"Refreshing materialized view: {view}")
-                        db.refresh_materialized_view(view)
-                        view_elapsed = time.time() - view_start
-                        self.logger.info(f"Refreshed {view} in {view_elapsed:.2f}s")
-                    except Exception as e:
-                        failure_count += 1
-                        view_elapsed = time.time() - view_start
-                        self.logger.error(
-                            f"Failed to refresh {view} after {view_elapsed:.2f}s: {e}",
-                            exc_info=True,
-                        )
+            # The statistics views do not depend on each other, so they can be
+            # refreshed concurrently on separate pooled connections
+            semaphore = asyncio.Semaphore(parallel)
+
+            async def bounded_refresh(view: str) -> str:
+                async with semaphore:
+                    return await self._refresh_view(view)
+
+            results = await asyncio.gather(*(bounded_refresh(view) for view in views))
+            failure_count = results.count("failed")
 
             elapsed = time.time() - start_time
             if failure_count == 0:
-                self.logger.info(f"Statistics refresh completed in {elapsed:.2f}s")
+                self.logger.info(
+                    f"Statistics refresh completed in {elapsed:.2f}s,"
+                    f" {results.count('skipped')} of {len(views)} views unchanged"
+                )
                 return True
             else:
                 self.logger.warning(
@@ -118,23 +135,51 @@ class ModelRefreshCommand(WorkerCommand):
             )
             return False
 
+    async def _refresh_view(self, view: str) -> str:
+        """
+        Refresh a materialized view unless its source tables did not change.
+
+        Returns:
+            "refreshed", "skipped" or "failed"
+        """
+        force = bool(getattr(self.args, "force", False))
+        view_start = time.time()
+        try:
+            self.logger.info(f"Refreshing materialized view: {view}")
+            with telemetry.stage(f"refresh {view}"):
+                adb = self.fundermaps.adb
+                refreshed = await adb.refresh_materialized_view_if_changed(view, force)
+            view_elapsed = time.time() - view_start
+            if not refreshed:
+                self.logger.info(f"Skipped {view}, its sources did not change")
+                return "skipped"
+            self.logger.info(f"Refreshed {view} in {view_elapsed:.2f}s")
+            return "refreshed"
+        except Exception as e:
+            view_elapsed = time.time() - view_start
+            self.logger.error(
+                f"Failed to refresh {view} after {view_elapsed:.2f}s: {e}",
+                exc_info=True,
+            )
+            return "failed"
+
     async def execute(self) -> int:
         """Execute the model refresh command."""
         success = True
 
         if getattr(self.args, "view", None):
             self.logger.info(f"Refreshing single view: {self.args.view}")
-            return 0 if self._db_refresh_statistics(self.args.view) else 1
+            return 0 if await self._db_refresh_statistics(self.args.view) else 1
 
         if not getattr(self.args, "skip_risk", False):
             self.logger.info("Step 1: Calculating risk metrics...")
-            if not self._db_calculate_risk():
+            if not await self._db_calculate_risk():
                 success = False
                 self.logger.error("Risk calculation failed")
 
         if not getattr(self.args, "skip_statistics", False):
             self.logger.info("Step 2: Refreshing statistics...")
-            if not self._db_refresh_statistics():
+            if not await self._db_refresh_statistics():
                 success = False
                 self.logger.error("Statistics refresh failed")
 
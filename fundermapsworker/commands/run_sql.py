@@ -0,0 +1,80 @@
+import argparse
+import asyncio
+import time
+
+from fundermapsworker.command import WorkerCommand
+from fundermapsworker.sql_script import SqlScriptRunner
+
+
+class RunSqlCommand(WorkerCommand):
+    """Command to run SQL scripts from the sql/ directory."""
+
+    def __init__(self):
+        super().__init__(description="Run SQL scripts from the sql/ directory")
+
+    def add_arguments(self, parser: argparse.ArgumentParser):
+        """Add command-line arguments for the command."""
+        parser.add_argument(
+            "--scripts",
+            nargs="+",
+            required=True,
+            help="Scripts relative to sql/, e.g. model/create_helper_functions."
+            " Arguments run in order; comma separated scripts within an argument"
+            " are independent and may run concurrently",
+        )
+        parser.add_argument(
+            "--parallel",
+            type=int,
+            default=1,
+            help="Number of independent scripts run at once, each on its own"
+            " connection (default: 1)",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Run idempotent scripts even if they did not change",
+        )
+
+    @staticmethod
+    def _groups(scripts) -> list[list[str]]:
+        # Jobs may pass a group as a list instead of a comma separated string
+        groups = []
+        for group in scripts:
+            if isinstance(group, str):
+                group = group.split(",")
+            groups.append([name.strip() for name in group if name.strip()])
+        return [group for group in groups if group]
+
+    async def execute(self):
+        """Execute the SQL script command."""
+        groups = self._groups(self.args.scripts or [])
+        if not groups:
+            self.logger.error("No SQL scripts given")
+            return 1
+
+        runner = SqlScriptRunner(
+            self.fundermaps.adb, force=getattr(self.args, "force", False)
+        )
+        start_time = time.time()
+
+        try:
+            runs = await runner.run_all(
+                groups, parallel=getattr(self.args, "parallel", None) or 1
+            )
+        except Exception as e:
+            elapsed = time.time() - start_time
+            self.logger.error(f"SQL scripts failed after {elapsed:.2f}s: {e}")
+            return 1
+
+        skipped = sum(run.skipped for run in runs)
+        elapsed = time.time() - start_time
+        self.logger.info(
+            f"Ran {len(runs) - skipped} SQL script(s) in {elapsed:.2f}s,"
+            f" {skipped} unchanged script(s) skipped"
+        )
+        return 0
+
+
+if __name__ == "__main__":
+    exit_code = asyncio.run(RunSqlCommand().run())
+    exit(exit_code)
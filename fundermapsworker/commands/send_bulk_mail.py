@@ -0,0 +1,85 @@
+import argparse
+import asyncio
+
+from fundermapsworker.command import WorkerCommand
+from fundermapsworker.providers.mail import BatchEmail
+
+
+class SendBulkMailCommand(WorkerCommand):
+    def __init__(self):
+        super().__init__(description="Send an email to many recipients")
+
+    def add_arguments(self, parser: argparse.ArgumentParser):
+        """Add command-line arguments for the command."""
+        parser.add_argument(
+            "--recipients",
+            nargs="+",
+            required=True,
+            help="Recipient email addresses; more than one batch request worth of"
+            " recipients is queued as one send_bulk_mail job per request",
+        )
+        parser.add_argument("--subject", type=str, required=True, help="Email subject")
+        parser.add_argument(
+            "--text",
+            type=str,
+            required=True,
+            help="Email body text, may refer to recipient variables as %%recipient.NAME%%",
+        )
+
+    async def execute(self):
+        """Execute the bulk email sending command."""
+        # Jobs may pass recipient variables as a mapping of address to variables
+        recipients = self.args.recipients
+        if isinstance(recipients, str):
+            recipients = [recipients]
+        if not isinstance(recipients, dict):
+            recipients = {address: {} for address in recipients}
+
+        if not recipients:
+            print("No recipients given")
+            return 1
+
+        email = BatchEmail(
+            recipients=recipients,
+            subject=self.args.subject,
+            text=self.args.text,
+        )
+
+        # A retry resends every chunk of a batch, so a batch that takes more
+        # than one request is queued as one job per chunk instead. Each job
+        # then sends or retries its own chunk only.
+        chunks = email.split()
+        if len(chunks) > 1:
+            job_ids = await self.run_blocking(
+                self.fundermaps.queue.enqueue_pipeline,
+                [
+                    [
+                        (
+                            "send_bulk_mail",
+                            {
+                                "recipients": chunk.recipients,
+                                "subject": chunk.subject,
+                                "text": chunk.text,
+                            },
+                        )
+                        for chunk in chunks
+                    ]
+                ],
+            )
+            print(
+                f"Queued {len(job_ids[0])} send_bulk_mail job(s) for"
+                f" {len(recipients)} recipient(s) with subject '{self.args.subject}'"
+            )
+            return 0
+
+        message_ids = await self.run_blocking(self.fundermaps.mail.send_batch, email)
+        print(
+            f"Email sent to {len(recipients)} recipient(s) in {len(message_ids)}"
+            f" request(s) with subject '{self.args.subject}'"
+        )
+        return 0
+
+
+if __name__ == "__main__":
+    exit_code = asyncio.run(SendBulkMailCommand().run())
+    exit(exit_code)
@@ -29,7 +29,7 @@ class SendMailCommand(WorkerCommand):
                 subject=self.args.subject,
                 text=self.args.text,
             )
-            self.fundermaps.mail.send_simple_message(email)
+            await self.run_blocking(self.fundermaps.mail.send_simple_message, email)
             print(f"Email sent to {self.args.to} with subject '{self.args.subject}'")
             return 0
         else:
@@ -12,6 +12,9 @@ class DatabaseConfig:
         user (str): The user for the database.
         password (str): The password for the database.
         port (int): The port for the database.
+        pool_size (int): Maximum number of pooled connections, 0 disables pooling.
+        pool_max_lifetime (float): Seconds after which a pooled connection is recycled.
+        pool_timeout (float): Seconds to wait for a free pooled connection.
     """
 
     database: str
@@ -19,6 +22,9 @@ class DatabaseConfig:
     user: str
     password: str
     port: int
+    pool_size: int = 0
+    pool_max_lifetime: float = 1800.0
+    pool_timeout: float = 30.0
 
 
 @dataclass
@@ -0,0 +1,217 @@
+"""
+Host load based concurrency control for the FunderMaps worker.
+
+This module samples CPU load, available memory and free temporary disk space
+and derives how many jobs or tilesets the host can run at once, within
+configured bounds.
+
+Examples:
+    ```python
+    controller = HostLoadController(minimum=1, maximum=8)
+    sampler = asyncio.create_task(controller.run())
+
+    async with controller.slot():
+        await process(tileset)
+    ```
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import shutil
+import tempfile
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Time between host samples
+SAMPLE_INTERVAL: float = 15.0  # seconds
+
+# One minute load average per CPU above which the limit is lowered by one
+HIGH_LOAD: float = 1.0
+# Load per CPU below which the limit may be raised by one
+LOW_LOAD: float = 0.7
+
+# Fraction of memory or tmp disk left below which the limit is halved
+LOW_RESOURCES: float = 0.10
+# Fraction of memory and tmp disk left above which the limit may be raised
+AMPLE_RESOURCES: float = 0.25
+
+
+def adaptive_default() -> bool:
+    """Whether adaptive concurrency is enabled by FUNDERMAPS_ADAPTIVE."""
+    return os.environ.get("FUNDERMAPS_ADAPTIVE", "").lower() in ("1", "true", "yes")
+
+
+@dataclass
+class HostSample:
+    """
+    A snapshot of the host's resource usage.
+
+    Attributes:
+        load_per_cpu: One minute load average divided by the usable CPUs
+        memory_available: Fraction of memory available for new work
+        tmp_free: Fraction of the temporary directory's disk that is free
+    """
+
+    load_per_cpu: float
+    memory_available: float
+    tmp_free: float
+
+    def __str__(self) -> str:
+        return (
+            f"load {self.load_per_cpu:.2f}/cpu,"
+            f" {self.memory_available:.0%} memory available,"
+            f" {self.tmp_free:.0%} tmp disk free"
+        )
+
+
+def _memory_available() -> float:
+    """Read the fraction of available memory from /proc/meminfo."""
+    meminfo = {}
+    try:
+        for line in Path("/proc/meminfo").read_text().splitlines():
+            key, _, value = line.partition(":")
+            meminfo[key] = int(value.split()[0])
+        return meminfo["MemAvailable"] / meminfo["MemTotal"]
+    except (OSError, KeyError, ValueError, ZeroDivisionError):
+        # Without /proc memory is not taken into account
+        return 1.0
+
+
+def sample_host(tmp_dir: str | None = None) -> HostSample:
+    """
+    Sample the current host load.
+
+    Args:
+        tmp_dir: Directory whose disk is checked, default the temporary directory
+
+    Returns:
+        The host sample
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    disk = shutil.disk_usage(tmp_dir or tempfile.gettempdir())
+
+    return HostSample(
+        load_per_cpu=os.getloadavg()[0] / cpus,
+        memory_available=_memory_available(),
+        tmp_free=disk.free / disk.total if disk.total else 1.0,
+    )
+
+
+class HostLoadController:
+    """
+    Adjusts a concurrency limit to the host load, within bounds.
+
+    The limit starts at `minimum` and is raised one step per sample while the
+    host has CPU, memory and tmp disk to spare. It is lowered one step when
+    the CPUs are overloaded and halved when memory or tmp disk runs low, since
+    running out of those fails jobs rather than slowing them down.
+
+    The controller doubles as a semaphore whose size follows the limit. Slots
+    in use are never revoked; a lower limit only delays new acquisitions.
+
+    Attributes:
+        minimum: Lowest limit
+        maximum: Highest limit
+        limit: The current limit
+        tmp_dir: Directory whose disk is sampled, default the temporary directory
+    """
+
+    def __init__(self, minimum: int, maximum: int, tmp_dir: str | None = None):
+        if not 1 <= minimum <= maximum:
+            raise ValueError(
+                f"Invalid concurrency bounds {minimum}..{maximum},"
+                " expected 1 <= minimum <= maximum"
+            )
+
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = minimum
+        self.tmp_dir = tmp_dir
+        self.logger = logger
+
+        self._in_use = 0
+        self._changed: asyncio.Condition | None = None
+
+    def adjust(self, sample: HostSample) -> int:
+        """
+        Update the limit for a host sample.
+
+        Returns:
+            The new limit
+        """
+        if min(sample.memory_available, sample.tmp_free) < LOW_RESOURCES:
+            limit = self.limit // 2
+        elif sample.load_per_cpu > HIGH_LOAD:
+            limit = self.limit - 1
+        elif (
+            sample.load_per_cpu < LOW_LOAD
+            and min(sample.memory_available, sample.tmp_free) > AMPLE_RESOURCES
+        ):
+            limit = self.limit + 1
+        else:
+            limit = self.limit
+
+        self.limit = max(self.minimum, min(self.maximum, limit))
+        return self.limit
+
+    @property
+    def _condition(self) -> asyncio.Condition:
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+        return self._changed
+
+    async def _notify(self) -> None:
+        async with self._condition:
+            self._condition.notify_all()
+
+    @contextlib.asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one of the `limit` slots for the duration of the block."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_use < self.limit)
+            self._in_use += 1
+        try:
+            yield
+        finally:
+            self._in_use -= 1
+            await asyncio.shield(self._notify())
+
+    async def run(
+        self,
+        interval: float = SAMPLE_INTERVAL,
+        on_change: Callable[[int], None] | None = None,
+    ) -> None:
+        """
+        Sample the host and adjust the limit until cancelled.
+
+        Failed samples are logged and keep the current limit.
+
+        Args:
+            interval: Time between samples in seconds
+            on_change: Called with the new limit whenever it changes
+        """
+        while True:
+            try:
+                sample = await asyncio.to_thread(sample_host, self.tmp_dir)
+            except OSError as e:
+                self.logger.warning(f"Failed to sample host load: {e}")
+            else:
+                previous = self.limit
+                if self.adjust(sample) != previous:
+                    self.logger.info(
+                        f"Concurrency limit {previous} -> {self.limit} ({sample})"
+                    )
+                    await self._notify()
+                    if on_change is not None:
+                        on_change(self.limit)
+
+            await asyncio.sleep(interval)
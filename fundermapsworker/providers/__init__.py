@@ -1,14 +1,18 @@
+from fundermapsworker.providers.adb import AsyncDbProvider
 from fundermapsworker.providers.db import DbProvider
 from fundermapsworker.providers.gdal import GDALProvider
 from fundermapsworker.providers.mail import Email, MailProvider
 from fundermapsworker.providers.pdf import PDFProvider
+from fundermapsworker.providers.queue import JobQueueProvider
 from fundermapsworker.providers.storage import ObjectStorageProvider
 from fundermapsworker.providers.tippecanoe import tippecanoe
 
 __all__ = [
+    "AsyncDbProvider",
     "DbProvider",
     "Email",
     "GDALProvider",
+    "JobQueueProvider",
     "MailProvider",
     "ObjectStorageProvider",
     "PDFProvider",
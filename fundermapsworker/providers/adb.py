@@ -0,0 +1,200 @@
+"""
+Asyncio database functionality for FunderMapsSDK.
+
+This module provides a psycopg 3 based database provider whose queries run on
+the event loop instead of blocking it.
+"""
+
+import asyncio
+import contextlib
+import logging
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+import psycopg
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import AsyncConnectionPool
+
+from fundermapsworker.config import DatabaseConfig
+from fundermapsworker.sql_script import ScriptRun, SqlScriptRunner
+
+logger = logging.getLogger(__name__)
+
+# Pool size used when the database configuration disables pooling
+DEFAULT_POOL_SIZE: int = 4
+
+
+class AsyncDbProvider:
+    """
+    Provider for asynchronous database access.
+
+    Offers the same operations as DbProvider, but every operation awaits its
+    own connection from a shared async pool. Independent operations started
+    concurrently, e.g. refreshes of unrelated materialized views, therefore
+    run in parallel on separate connections.
+
+    Attributes:
+        _sdk: Reference to the parent SDK instance
+        config: Database configuration settings
+        sql_directory: Directory that SQL scripts are loaded from
+    """
+
+    def __init__(self, sdk, config: DatabaseConfig):
+        """
+        Initialize the async database provider with SDK reference and configuration.
+
+        Args:
+            sdk: The parent SDK instance
+            config: Database configuration
+        """
+        self._sdk = sdk
+        self.config = config
+        self.logger = logger
+
+        # Scripts live in the top-level sql/ directory, next to the package
+        self.sql_directory = Path(self._sdk.base_directory).parent / "sql"
+
+        self._pool: AsyncConnectionPool | None = None
+        self._pool_lock = asyncio.Lock()
+
+    @property
+    def conninfo(self) -> str:
+        return make_conninfo(
+            dbname=self.config.database,
+            user=self.config.user,
+            password=self.config.password,
+            host=self.config.host,
+            port=self.config.port,
+            connect_timeout=10,
+            keepalives=1,
+            keepalives_idle=30,
+            keepalives_interval=10,
+            keepalives_count=5,
+        )
+
+    async def pool(self) -> AsyncConnectionPool:
+        """
+        The shared connection pool, opened on first use.
+
+        The pool holds up to `config.pool_size` connections, or
+        DEFAULT_POOL_SIZE when pooling is disabled for the synchronous provider.
+        """
+        if self._pool is None:
+            async with self._pool_lock:
+                if self._pool is None:
+                    max_size = self.config.pool_size or DEFAULT_POOL_SIZE
+                    self.logger.debug(
+                        f"Opening async connection pool of {max_size} connections"
+                    )
+                    pool = AsyncConnectionPool(
+                        self.conninfo,
+                        min_size=1,
+                        max_size=max_size,
+                        max_lifetime=self.config.pool_max_lifetime,
+                        timeout=self.config.pool_timeout,
+                        kwargs={"autocommit": True},
+                        open=False,
+                    )
+                    await pool.open()
+                    self._pool = pool
+        return self._pool
+
+    @contextlib.asynccontextmanager
+    async def connection(self) -> AsyncIterator[psycopg.AsyncConnection]:
+        """
+        Check out an autocommit connection from the pool.
+
+        Use this for statements that must share a session; the connection is
+        returned to the pool when the block exits.
+        """
+        pool = await self.pool()
+        async with pool.connection() as connection:
+            yield connection
+
+    async def execute(self, query: str, params=None) -> None:
+        """
+        Execute a single query on a pooled connection.
+        """
+        async with self.connection() as connection, connection.cursor() as cur:
+            await cur.execute(query, params)
+
+    async def reindex_table(self, table: str):
+        """
+        Reindex the specified table.
+        """
+
+        self.logger.debug(f"Reindexing table {table}")
+
+        await self.execute(f"REINDEX TABLE CONCURRENTLY {table};")
+
+    async def call(self, procedure: str):
+        """
+        Call the specified procedure.
+        """
+
+        self.logger.debug(f"Calling procedure {procedure}")
+
+        await self.execute(f"CALL {procedure}();")
+
+    async def refresh_materialized_view(self, view: str):
+        """
+        Refresh the specified materialized view.
+        """
+
+        self.logger.debug(f"Refreshing materialized view {view}")
+
+        await self.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view};")
+
+    async def refresh_materialized_view_if_changed(
+        self, view: str, force: bool = False
+    ) -> bool:
+        """
+        Refresh the specified materialized view if its source tables changed.
+
+        See data.refresh_matview_if_changed() in
+        sql/model/create_matview_refresh_state.sql.
+
+        Args:
+            view: The materialized view to refresh
+            force: Refresh even if the source tables did not change
+
+        Returns:
+            True if the view was refreshed, False if it was skipped
+        """
+
+        self.logger.debug(f"Refreshing materialized view {view} if changed")
+
+        async with self.connection() as connection, connection.cursor() as cur:
+            await cur.execute(
+                "SELECT data.refresh_matview_if_changed(%s, %s);", (view, force)
+            )
+            (refreshed,) = await cur.fetchone()
+        return refreshed
+
+    async def execute_script(self, script: str, force: bool = False) -> ScriptRun:
+        """
+        Execute the specified SQL script statement by statement.
+
+        Idempotent scripts that did not change since they were last applied
+        are skipped, see fundermapsworker.sql_script.
+
+        Args:
+            script: Path of the script relative to the sql/ directory, e.g.
+                "model/create_helper_functions"
+            force: Run the script even if it is idempotent and unchanged
+
+        Returns:
+            The outcome of the run, with the time taken by every statement
+        """
+
+        return await SqlScriptRunner(self, force=force).run(script)
+
+    async def aclose(self):
+        """
+        Close the connection pool, if any.
+        """
+
+        if self._pool is not None:
+            self.logger.debug("Closing async connection pool")
+            pool, self._pool = self._pool, None
+            await pool.close()
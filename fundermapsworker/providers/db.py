@@ -1,12 +1,242 @@
+import asyncio
+import contextvars
+import copy
+import io
+import itertools
 import logging
+import threading
+import time
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import IO, Any
 
 import psycopg2
+import psycopg2.extensions
 
 from fundermapsworker.config import DatabaseConfig
+from fundermapsworker.sql_script import (
+    CREATE_STATE_TABLE,
+    RECORD_SCRIPT,
+    SELECT_CHECKSUM,
+    ScriptRun,
+    SqlScript,
+    should_skip,
+)
 
 logger = logging.getLogger(__name__)
 
+# Idle connections older than this are checked with a round trip before reuse
+HEALTH_CHECK_AFTER: float = 30.0  # seconds
+
+# Bytes exchanged with the server per COPY round trip
+COPY_BUFFER_SIZE: int = 64 * 1024
+
+# Rows fetched per round trip when streaming a query result
+STREAM_ITERSIZE: int = 2000
+
+# Characters escaped in COPY text format values
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes available in time."""
+
+
+def _on_event_loop() -> bool:
+    """Whether the calling thread is running an asyncio event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+@dataclass
+class _PooledConnection:
+    connection: psycopg2.extensions.connection
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class ConnectionPool:
+    """
+    A bounded, thread-safe pool of autocommit database connections.
+
+    Connections are checked out with `getconn` and handed back with `putconn`.
+    Connections past their maximum lifetime are closed instead of reused, and
+    connections that sat idle for a while are health checked on checkout.
+
+    Attributes:
+        max_size: Maximum number of open connections
+        max_lifetime: Maximum connection age in seconds before it is recycled
+        timeout: Maximum time in seconds to wait for a free connection
+    """
+
+    def __init__(self, connect, max_size: int, max_lifetime: float, timeout: float):
+        self._connect = connect
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.logger = logger
+
+        self._idle: list[_PooledConnection] = []
+        self._in_use: dict[int, _PooledConnection] = {}
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _expired(self, entry: _PooledConnection) -> bool:
+        return time.monotonic() - entry.created_at > self.max_lifetime
+
+    def _healthy(self, entry: _PooledConnection) -> bool:
+        if entry.connection.closed or self._expired(entry):
+            return False
+        if time.monotonic() - entry.last_used < HEALTH_CHECK_AFTER:
+            return True
+
+        try:
+            with entry.connection.cursor() as cur:
+                cur.execute("SELECT 1")
+            return True
+        except psycopg2.Error as e:
+            self.logger.debug(f"Discarding unhealthy pooled connection: {e}")
+            return False
+
+    def _discard(self, entry: _PooledConnection) -> None:
+        if not entry.connection.closed:
+            entry.connection.close()
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def getconn(self) -> psycopg2.extensions.connection:
+        """
+        Check out a connection, opening a new one if the pool has room.
+
+        Waiting for a connection blocks the calling thread. On a thread running
+        an event loop that would freeze every other task, including lease
+        heartbeats, so there the pool does not wait at all; check out
+        connections from executor threads, e.g. with `run_blocking`.
+
+        Raises:
+            PoolTimeoutError: If the pool is exhausted for longer than `timeout`,
+                or at all when called on an event loop thread
+        """
+        on_event_loop = _on_event_loop()
+        deadline = time.monotonic() + (0 if on_event_loop else self.timeout)
+
+        while True:
+            entry = None
+            with self._cond:
+                while not self._idle and self._size >= self.max_size:
+                    if self._closed:
+                        raise PoolTimeoutError("Connection pool is closed")
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 and on_event_loop:
+                        raise PoolTimeoutError(
+                            "No database connection available and waiting would"
+                            " block the event loop; use run_blocking"
+                        )
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"No database connection available after {self.timeout}s"
+                        )
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    entry = self._idle.pop()
+                else:
+                    self._size += 1
+
+            if entry is None:
+                try:
+                    entry = _PooledConnection(self._connect())
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._healthy(entry):
+                self._discard(entry)
+                continue
+
+            with self._cond:
+                self._in_use[id(entry.connection)] = entry
+            return entry.connection
+
+    def putconn(self, connection: psycopg2.extensions.connection) -> None:
+        """
+        Return a checked out connection to the pool.
+
+        Any open transaction is rolled back. Broken and expired connections are
+        closed so their slot can be reused for a fresh connection.
+        """
+        with self._cond:
+            entry = self._in_use.pop(id(connection))
+
+        if not connection.closed:
+            try:
+                status = connection.info.transaction_status
+                if status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+                connection.autocommit = True
+            except psycopg2.Error:
+                connection.close()
+
+        if connection.closed or self._closed or self._expired(entry):
+            self._discard(entry)
+            return
+
+        entry.last_used = time.monotonic()
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    def close(self) -> None:
+        """Close all idle connections; in-use connections close on return."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+
+        for entry in idle:
+            self._discard(entry)
+
+
+class _CopyRows(io.TextIOBase):
+    """
+    Readable stream of rows encoded in COPY text format.
+
+    Rows are encoded only as COPY reads them, so an iterable of any length is
+    sent with constant memory use.
+    """
+
+    def __init__(self, rows: Iterable[Sequence[Any]]):
+        self._rows = iter(rows)
+        self._buffer = ""
+
+    @staticmethod
+    def _encode(value: Any) -> str:
+        if value is None:
+            return "\\N"
+        return str(value).translate(_COPY_ESCAPES)
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int | None = -1) -> str:
+        while size is None or size < 0 or len(self._buffer) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._buffer += "\t".join(map(self._encode, row)) + "\n"
+
+        if size is None or size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
 
 class DbProvider:
     def __init__(self, sdk, config: DatabaseConfig):
@@ -15,7 +245,16 @@ class DbProvider:
         self.db = None
         self.logger = logger
 
-        self.sql_directory = Path(self._sdk.base_directory) / "sql"
+        # Scripts live in the top-level sql/ directory, next to the package
+        self.sql_directory = Path(self._sdk.base_directory).parent / "sql"
+
+        self._pool: ConnectionPool | None = None
+        self._pool_lock = threading.Lock()
+        self._sessions: contextvars.ContextVar[tuple[DbProvider, ...]] = (
+            contextvars.ContextVar(f"db_sessions_{id(self)}", default=())
+        )
+        # Names for server-side cursors, shared by all sessions
+        self._stream_ids = itertools.count()
 
     def reindex_table(self, table: str):
         """
@@ -78,26 +317,193 @@ class DbProvider:
         with self.db.cursor() as cur:
             cur.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view};")
 
-    def execute_script(self, script: str):
+    def execute_script(self, script: str, force: bool = False) -> ScriptRun:
         """
-        Execute the specified SQL script.
+        Execute the specified SQL script statement by statement.
+
+        Idempotent scripts that did not change since they were last applied
+        are skipped, see fundermapsworker.sql_script.
+
+        Args:
+            script: Path of the script relative to the sql/ directory, e.g.
+                "load/load_building"
+            force: Run the script even if it is idempotent and unchanged
+
+        Returns:
+            The outcome of the run, with the time taken by every statement
         """
 
-        sql_file_path = f"{script}.sql"
-        self.logger.debug(f"Running SQL script: {sql_file_path}")
+        sql_script = SqlScript.load(self.sql_directory, script)
+        run = ScriptRun(sql_script.name)
+        start_time = time.monotonic()
 
-        file_path = self.sql_directory / sql_file_path
+        with self.db.cursor() as cur:
+            cur.execute(CREATE_STATE_TABLE)
+            cur.execute(SELECT_CHECKSUM, (sql_script.name,))
+            row = cur.fetchone()
 
-        with file_path.open() as sql_file:
-            sql_script = sql_file.read()
+        if should_skip(sql_script, row[0] if row else None, force):
+            run.skipped = True
+            self.logger.info(str(run))
+            return run
 
+        self.logger.debug(f"Running SQL script: {sql_script.name}")
+
+        # Like a script sent in one query, run it as a single transaction
+        # unless it manages transactions itself
+        self.db.autocommit = not sql_script.transactional
+        try:
             with self.db.cursor() as cur:
-                cur.execute(sql_script)
+                for statement in sql_script.statements:
+                    statement_start = time.monotonic()
+                    cur.execute(statement.sql)
+                    duration = time.monotonic() - statement_start
+
+                    run.timings.append((statement, duration))
+                    self.logger.debug(
+                        f"{sql_script.name}:{statement.line} {statement.summary}"
+                        f" ({duration:.2f}s)"
+                    )
+
+                run.duration = time.monotonic() - start_time
+                cur.execute(
+                    RECORD_SCRIPT,
+                    (
+                        sql_script.name,
+                        sql_script.checksum,
+                        len(sql_script.statements),
+                        run.duration,
+                    ),
+                )
+
+            if not self.db.autocommit:
+                self.db.commit()
+        except Exception:
+            if not self.db.autocommit:
+                self.db.rollback()
+            raise
+        finally:
+            self.db.autocommit = True
+
+        self.logger.info(str(run))
+        return run
+
+    def stream(
+        self, query: str, params=None, itersize: int = STREAM_ITERSIZE
+    ) -> Iterator[tuple]:
+        """
+        Iterate over the result of a query with a server-side cursor.
+
+        Rows are fetched `itersize` at a time, so memory use does not grow with
+        the size of the result. The cursor is declared WITH HOLD, so it works
+        on autocommit connections and other statements, including writes to
+        the queried tables, can run on the connection while iterating.
+
+        Args:
+            query: The query to run
+            params: Optional query parameters
+            itersize: Number of rows fetched per round trip
+
+        Yields:
+            The result rows
+        """
+
+        name = f"stream_{next(self._stream_ids)}"
+        self.logger.debug(f"Streaming query result with cursor {name}")
+
+        with self.db.cursor(name, withhold=True) as cur:
+            cur.itersize = itersize
+            cur.execute(query, params)
+            yield from cur
+
+    def copy_in(
+        self,
+        table: str,
+        source: IO | Iterable[Sequence[Any]],
+        columns: Sequence[str] | None = None,
+        options: str = "FORMAT text",
+    ) -> int:
+        """
+        Bulk load rows into a table with COPY ... FROM STDIN.
+
+        Data is streamed to the server in chunks, so memory use does not grow
+        with the amount of data.
+
+        Args:
+            table: The table to load into
+            source: A file object with data in the format given by `options`,
+                or an iterable of rows, which are sent in COPY text format
+            columns: The columns to load, default all columns of the table
+            options: COPY options for a file object source, e.g.
+                "FORMAT csv, HEADER true"
+
+        Returns:
+            The number of rows loaded
+        """
+
+        self.logger.debug(f"Copying rows into {table}")
+
+        if not hasattr(source, "read"):
+            source = _CopyRows(source)
+            options = "FORMAT text"
+
+        column_list = f" ({', '.join(columns)})" if columns else ""
+        with self.db.cursor() as cur:
+            cur.copy_expert(
+                f"COPY {table}{column_list} FROM STDIN WITH ({options})",
+                source,
+                size=COPY_BUFFER_SIZE,
+            )
+            return cur.rowcount
+
+    def copy_out(
+        self,
+        query: str,
+        sink: IO | str | Path,
+        params=None,
+        options: str = "FORMAT csv, HEADER true",
+    ) -> int:
+        """
+        Export the result of a query with COPY ... TO STDOUT.
+
+        Data is streamed from the server in chunks, so memory use does not
+        grow with the size of the result.
+
+        Args:
+            query: The query to export, may contain parameter placeholders
+            sink: A writable file object or a path to write the data to
+            params: Optional query parameters
+            options: COPY options, default CSV with a header row
+
+        Returns:
+            The number of rows exported
+        """
+
+        self.logger.debug("Copying query result")
+
+        with self.db.cursor() as cur:
+            # COPY does not accept parameters; bind them client side
+            if params is not None:
+                query = cur.mogrify(query, params).decode()
+            sql = f"COPY ({query}) TO STDOUT WITH ({options})"
+
+            if isinstance(sink, str | Path):
+                with Path(sink).open(mode="w", newline="") as file:
+                    cur.copy_expert(sql, file, size=COPY_BUFFER_SIZE)
+            else:
+                cur.copy_expert(sql, sink, size=COPY_BUFFER_SIZE)
+            return cur.rowcount
+
+    def connect(self):
+        """
+        Open a new autocommit connection to the database.
+
+        The caller owns the returned connection and is responsible for closing it.
+        """
 
-    def __enter__(self):
         self.logger.debug("Connecting to database")
 
-        self.db = psycopg2.connect(
+        connection = psycopg2.connect(
             dbname=self.config.database,
             user=self.config.user,
             password=self.config.password,
@@ -109,13 +515,61 @@ class DbProvider:
             keepalives_interval=10,
             keepalives_count=5,
         )
-        self.db.autocommit = True
+        connection.autocommit = True
 
         self.logger.debug("Connected to database")
 
-        return self
+        return connection
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self.logger.debug("Closing database connection")
+    @property
+    def pool(self) -> ConnectionPool | None:
+        """
+        The shared connection pool, or None when pooling is disabled.
+
+        The pool is created on first use when `config.pool_size` is positive.
+        """
 
-        self.db.close()
+        if self._pool is None and self.config.pool_size > 0:
+            with self._pool_lock:
+                if self._pool is None:
+                    self.logger.debug(
+                        f"Creating connection pool of {self.config.pool_size} connections"
+                    )
+                    self._pool = ConnectionPool(
+                        self.connect,
+                        max_size=self.config.pool_size,
+                        max_lifetime=self.config.pool_max_lifetime,
+                        timeout=self.config.pool_timeout,
+                    )
+        return self._pool
+
+    def close(self):
+        """
+        Close the connection pool, if any.
+        """
+
+        if self._pool is not None:
+            self.logger.debug("Closing connection pool")
+            self._pool.close()
+            self._pool = None
+
+    def __enter__(self):
+        pool = self.pool
+
+        # Every checkout gets its own session so concurrent jobs sharing this
+        # provider never see each other's connection.
+        session = copy.copy(self)
+        session.db = pool.getconn() if pool else self.connect()
+        self._sessions.set((*self._sessions.get(), session))
+
+        return session
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        *sessions, session = self._sessions.get()
+        self._sessions.set(tuple(sessions))
+
+        if self._pool is not None:
+            self._pool.putconn(session.db)
+        else:
+            self.logger.debug("Closing database connection")
+            session.db.close()
@@ -1,8 +1,8 @@
-import asyncio
 import logging
 from pathlib import Path
 
 from fundermapsworker.config import DatabaseConfig
+from fundermapsworker.util import run_subprocess
 
 logger = logging.getLogger(__name__)
 
@@ -41,11 +41,7 @@ class GDALProvider:
         self.logger = logger
 
     async def version(self) -> tuple[int, int, int]:
-        process = await asyncio.create_subprocess_exec(
-            "ogr2ogr", "--version", stdout=asyncio.subprocess.PIPE
-        )
-
-        stdout, _ = await process.communicate()
+        _, stdout, _ = await run_subprocess("ogr2ogr", "--version")
         version_output = stdout.decode().strip()
         version_number = version_output.split()[1].strip(",")
 
@@ -113,7 +109,8 @@ class GDALProvider:
                     ]
                 )
 
-        process = await asyncio.create_subprocess_exec(
+        # Runs in its own process group so a cancelled job also stops ogr2ogr
+        returncode, stdout, stderr = await run_subprocess(
             "ogr2ogr",
             *cmd_args,
             "-f",
@@ -121,15 +118,11 @@ class GDALProvider:
             output,
             input,
             *args,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
         )
 
-        stdout, stderr = await process.communicate()
-
-        if process.returncode == 0:
+        if returncode == 0:
             self.logger.debug(f"Command succeeded: {stdout.decode().strip()}")
         else:
             raise Exception(f"Command failed: {stderr.decode().strip()}")
 
-        return process.returncode == 0
+        return returncode == 0
@@ -4,8 +4,10 @@ Email functionality for FunderMapsSDK.
 This module provides email sending capabilities using the Mailgun API.
 """
 
+import json
 import logging
 from dataclasses import dataclass
+from typing import Any
 
 from mailgun.client import Client
 
@@ -13,6 +15,9 @@ from fundermapsworker.config import MailConfig
 
 logger = logging.getLogger(__name__)
 
+# Mailgun accepts at most this many recipients per batch sending request
+MAX_BATCH_RECIPIENTS: int = 1000
+
 
 @dataclass
 class Email:
@@ -32,6 +37,43 @@ class Email:
     from_: str | None = None
 
 
+@dataclass
+class BatchEmail:
+    """
+    Email sent individually to many recipients.
+
+    The subject and text may refer to recipient variables, e.g.
+    `Hello %recipient.name%`; `%recipient%` is the recipient's address.
+
+    Attributes:
+        recipients: Recipient email addresses, mapped to their variables
+        subject: Email subject line
+        text: Plain text content of the email
+        from_: Optional sender email address (overrides default sender)
+    """
+
+    recipients: dict[str, dict[str, Any]]
+    subject: str
+    text: str
+    from_: str | None = None
+
+    def split(self, size: int = MAX_BATCH_RECIPIENTS) -> list["BatchEmail"]:
+        """Split the email into emails of at most `size` recipients each."""
+        addresses = list(self.recipients)
+        return [
+            BatchEmail(
+                recipients={
+                    address: self.recipients[address]
+                    for address in addresses[start : start + size]
+                },
+                subject=self.subject,
+                text=self.text,
+                from_=self.from_,
+            )
+            for start in range(0, len(addresses), size)
+        ]
+
+
 class MailProvider:
     """
     Provider for sending emails via the Mailgun API.
@@ -75,9 +117,7 @@ class MailProvider:
         """
         self.logger.debug(f"Sending email to {email.to}")
 
-        from_ = (
-            email.from_ or f"{self.config.sender_name} <{self.config.sender_address}>"
-        )
+        from_ = email.from_ or self.default_sender
         to = ", ".join(email.to)
 
         message_params = {
@@ -90,18 +130,91 @@ class MailProvider:
         self.logger.info(f"Email parameters: {message_params}")
 
         try:
-            response = self.client.messages.create(
-                domain=self.config.domain, data=message_params
-            )
-
-            if response.status_code == 200:
-                response_data = response.json()
-                message_id = response_data.get("id", "unknown")
-                self.logger.debug(f"Email sent successfully: {message_id}")
-            else:
-                response_data = response.json()
-                message = response_data.get("message", "No message provided")
-                raise Exception(f"Failed to send email: {message}")
+            message_id = self._create_message(message_params)
+            self.logger.debug(f"Email sent successfully: {message_id}")
         except Exception as e:
             self.logger.error(f"Failed to send email to {to}: {e}")
             raise
+
+    def send_batch(self, email: BatchEmail) -> list[str]:
+        """
+        Send an email to many recipients using Mailgun batch sending.
+
+        Recipients are sent in chunks of MAX_BATCH_RECIPIENTS, one API request
+        per chunk. Every recipient receives an individual message with their
+        own variables substituted and only their own address in the To header.
+
+        Sending is not idempotent: retrying after a failed chunk sends the
+        earlier chunks again. Callers that retry should send one chunk per
+        attempt, see BatchEmail.split.
+
+        Args:
+            email: A BatchEmail object containing recipients, subject, and content
+
+        Raises:
+            Exception: If a chunk fails to send; earlier chunks have been sent
+
+        Returns:
+            The Mailgun message IDs, one per request
+        """
+        total = len(email.recipients)
+        self.logger.info(f"Sending '{email.subject}' to {total} recipient(s)")
+
+        message_ids = []
+        sent = 0
+        for chunk in email.split():
+            # Without recipient variables Mailgun sends a single message that
+            # shows every address to every recipient
+            message_params = {
+                "from": email.from_ or self.default_sender,
+                "to": list(chunk.recipients),
+                "subject": email.subject,
+                "text": email.text,
+                "recipient-variables": json.dumps(
+                    {
+                        address: variables or {}
+                        for address, variables in chunk.recipients.items()
+                    }
+                ),
+            }
+
+            try:
+                message_ids.append(self._create_message(message_params))
+            except Exception as e:
+                self.logger.error(
+                    f"Failed to send email to recipients {sent + 1}"
+                    f" to {sent + len(chunk.recipients)} of {total}: {e}"
+                )
+                raise
+
+            sent += len(chunk.recipients)
+            self.logger.debug(
+                f"Sent batch of {len(chunk.recipients)} email(s): {message_ids[-1]}"
+            )
+
+        return message_ids
+
+    @property
+    def default_sender(self) -> str:
+        return f"{self.config.sender_name} <{self.config.sender_address}>"
+
+    def _create_message(self, message_params: dict[str, Any]) -> str:
+        """
+        Submit a message to the Mailgun API.
+
+        Raises:
+            Exception: If Mailgun rejects the message
+
+        Returns:
+            The Mailgun message ID
+        """
+        response = self.client.messages.create(
+            domain=self.config.domain, data=message_params
+        )
+
+        response_data = response.json()
+        if response.status_code != 200:
+            message = response_data.get("message", "No message provided")
+            raise Exception(f"Failed to send email: {message}")
+
+        return response_data.get("id", "unknown")
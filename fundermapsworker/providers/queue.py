@@ -0,0 +1,679 @@
+"""
+Worker job queue functionality for FunderMapsSDK.
+
+This module provides access to the application.worker_jobs table, which is
+shared by all worker nodes.
+"""
+
+import logging
+import os
+import socket
+from typing import Any
+
+from psycopg2.extras import Json, execute_values
+
+from fundermapsworker.config import DatabaseConfig
+from fundermapsworker.telemetry import JobRun
+
+logger = logging.getLogger(__name__)
+
+# Channel notified by the application.worker_jobs insert trigger
+NOTIFY_CHANNEL = "worker_jobs"
+
+# Default time a claimed job stays leased without a heartbeat
+LEASE_DURATION: int = 300  # seconds
+
+# Matches jobs whose dependencies all completed; {job} is the job's table alias
+DEPENDENCIES_MET = """
+    NOT EXISTS (
+        SELECT 1
+        FROM application.worker_jobs AS parent
+        WHERE parent.id = ANY({job}.depends_on) AND parent.status <> 'completed'
+    )
+"""
+
+JOB_COLUMNS = (
+    "id",
+    "job_type",
+    "payload",
+    "priority",
+    "retry_count",
+    "max_retries",
+    "created_at",
+)
+
+
+class JobQueueProvider:
+    """
+    Provider for claiming and updating jobs in the worker_jobs table.
+
+    Jobs are claimed with a single UPDATE over a FOR UPDATE SKIP LOCKED
+    selection, so multiple worker nodes can poll the same table without
+    fetching or claiming the same rows.
+
+    Every claimed job is leased to this worker until `lease_expires_at`.
+    Running jobs renew their lease with `heartbeat`; jobs whose lease expired
+    because their worker died are returned to the queue by `reclaim_expired`.
+
+    Attributes:
+        _sdk: Reference to the parent SDK instance
+        config: Database configuration settings
+        worker_id: Identifies this worker process in claimed_by
+        lease_duration: Seconds a claimed job stays leased without a heartbeat
+    """
+
+    def __init__(self, sdk, config: DatabaseConfig):
+        """
+        Initialize the job queue provider with SDK reference and configuration.
+
+        Args:
+            sdk: The parent SDK instance that provides the database provider
+            config: Database configuration
+        """
+        self._sdk = sdk
+        self.config = config
+        self.logger = logger
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_duration = LEASE_DURATION
+
+    def claim(
+        self,
+        limit: int,
+        job_types: list[str] | None = None,
+        exclude_types: list[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Atomically claim up to `limit` pending jobs.
+
+        Rows locked by another worker are skipped rather than waited on, so
+        concurrent claims never return the same job twice.
+
+        Jobs are claimed in order of application.worker_job_rank, i.e. by
+        priority aged by waiting time: every 15 minutes a job waits counts as
+        one priority level, so a steady stream of high priority jobs cannot
+        starve low priority ones. Jobs with unfinished dependencies are not
+        claimed.
+
+        Args:
+            limit: Maximum number of jobs to claim
+            job_types: Optional list of job types to filter by
+            exclude_types: Optional list of job types to skip
+
+        Returns:
+            List of claimed job dictionaries, lowest rank first. Besides
+            the job columns, `coalesced` holds the number of followers claimed
+            along with the job, `queue_wait` the seconds since it was created,
+            `rank` its claim order and `has_dependents` whether other jobs
+            depend on it
+        """
+        if limit <= 0:
+            return []
+
+        self.logger.debug(f"Claiming up to {limit} pending job(s)")
+
+        params: dict[str, Any] = {
+            "limit": limit,
+            "worker_id": self.worker_id,
+            "lease_duration": self.lease_duration,
+        }
+        job_type_filter = ""
+        if job_types:
+            job_type_filter += " AND job_type = ANY(%(job_types)s)"
+            params["job_types"] = list(job_types)
+        if exclude_types:
+            job_type_filter += " AND job_type <> ALL(%(exclude_types)s)"
+            params["exclude_types"] = list(exclude_types)
+
+        # Pending jobs with the same coalesce_key (job type and payload) as a
+        # claimed job are claimed along with it as followers. They are not run
+        # themselves but complete or fail together with their leader. Followers
+        # are picked under the same rules as candidates: delayed duplicates,
+        # e.g. waiting out a retry backoff, and exhausted ones are left alone.
+        returning = ", ".join(f"wj.{column}" for column in JOB_COLUMNS)
+        query = f"""
+            WITH candidates AS (
+                SELECT id, coalesce_key
+                FROM application.worker_jobs AS job
+                WHERE
+                    status = 'pending'
+                    AND (process_after IS NULL OR process_after <= NOW())
+                    AND (max_retries = 0 OR retry_count < max_retries)
+                    AND {DEPENDENCIES_MET.format(job="job")}
+                    {job_type_filter}
+                ORDER BY application.worker_job_rank(created_at, priority)
+                LIMIT %(limit)s
+                FOR UPDATE SKIP LOCKED
+            ),
+            leaders AS (
+                SELECT DISTINCT ON (coalesce_key) id, coalesce_key
+                FROM candidates
+                ORDER BY coalesce_key, id
+            ),
+            followers AS (
+                SELECT f.id, leaders.id AS leader_id
+                FROM application.worker_jobs AS f
+                JOIN leaders ON leaders.coalesce_key = f.coalesce_key
+                WHERE
+                    f.status = 'pending'
+                    AND f.id <> leaders.id
+                    AND (f.process_after IS NULL OR f.process_after <= NOW())
+                    AND (f.max_retries = 0 OR f.retry_count < f.max_retries)
+                    AND {DEPENDENCIES_MET.format(job="f")}
+                FOR UPDATE OF f SKIP LOCKED
+            ),
+            claimed_followers AS (
+                UPDATE application.worker_jobs AS wj
+                SET
+                    status = 'processing',
+                    coalesced_into = followers.leader_id,
+                    claimed_by = %(worker_id)s,
+                    lease_expires_at = NOW() + %(lease_duration)s * INTERVAL '1 second',
+                    updated_at = NOW()
+                FROM followers
+                WHERE wj.id = followers.id
+                RETURNING wj.coalesced_into
+            )
+            UPDATE application.worker_jobs AS wj
+            SET
+                status = 'processing',
+                claimed_by = %(worker_id)s,
+                lease_expires_at = NOW() + %(lease_duration)s * INTERVAL '1 second',
+                updated_at = NOW()
+            FROM leaders
+            WHERE wj.id = leaders.id
+            RETURNING
+                {returning},
+                (
+                    SELECT count(*)
+                    FROM claimed_followers
+                    WHERE claimed_followers.coalesced_into = wj.id
+                ) AS coalesced,
+                EXTRACT(EPOCH FROM NOW() - wj.created_at)::float AS queue_wait,
+                application.worker_job_rank(wj.created_at, wj.priority) AS rank,
+                EXISTS (
+                    SELECT 1
+                    FROM application.worker_jobs AS dependent
+                    WHERE
+                        dependent.depends_on @> ARRAY[wj.id::bigint]
+                        AND dependent.status = 'pending'
+                ) AS has_dependents
+        """  # noqa: S608
+
+        with self._sdk.db as db, db.db.cursor() as cur:
+            cur.execute(query, params)
+            columns = [desc[0] for desc in cur.description]
+            jobs = [dict(zip(columns, row, strict=True)) for row in cur.fetchall()]
+
+        # RETURNING does not preserve the candidate ordering
+        jobs.sort(key=lambda job: job["rank"])
+        return jobs
+
+    def next_job_type(self, job_types: list[str] | None = None) -> str | None:
+        """
+        Look up the type of the pending job `claim` would claim first.
+
+        Args:
+            job_types: Optional list of job types to filter by
+
+        Returns:
+            The job type, or None if no job can be claimed
+        """
+        params: dict[str, Any] = {}
+        job_type_filter = ""
+        if job_types:
+            job_type_filter = " AND job_type = ANY(%(job_types)s)"
+            params["job_types"] = list(job_types)
+
+        query = f"""
+            SELECT job_type
+            FROM application.worker_jobs AS job
+            WHERE
+                status = 'pending'
+                AND (process_after IS NULL OR process_after <= NOW())
+                AND (max_retries = 0 OR retry_count < max_retries)
+                AND {DEPENDENCIES_MET.format(job="job")}
+                {job_type_filter}
+            ORDER BY application.worker_job_rank(created_at, priority)
+            LIMIT 1
+        """  # noqa: S608
+
+        with self._sdk.db as db, db.db.cursor() as cur:
+            cur.execute(query, params)
+            row = cur.fetchone()
+        return row[0] if row else None
+
+    def _insert_job(
+        self,
+        cur,
+        job_type: str,
+        payload: dict[str, Any] | None,
+        priority: int,
+        depends_on: list[int] | None,
+    ) -> int:
+        query = """
+            INSERT INTO application.worker_jobs (job_type, payload, priority, depends_on, status)
+            VALUES (%s, %s, %s, %s, 'pending')
+            RETURNING id
+        """
+        cur.execute(
+            query, (job_type, Json(payload or {}), priority, depends_on or None)
+        )
+        return cur.fetchone()[0]
+
+    def enqueue(
+        self,
+        job_type: str,
+        payload: dict[str, Any] | None = None,
+        priority: int = 0,
+        depends_on: list[int] | None = None,
+    ) -> int:
+        """
+        Submit a new pending job.
+
+        A job with the same type and payload as another pending job is
+        coalesced with it when claimed, so it does not run twice.
+
+        Args:
+            job_type: The type of job to submit
+            payload: Optional job payload
+            priority: Job priority, higher runs first
+            depends_on: IDs of jobs that must complete before this job runs
+
+        Returns:
+            The ID of the new job
+        """
+        self.logger.debug(f"Submitting {job_type} job")
+
+        with self._sdk.db as db, db.db.cursor() as cur:
+            return self._insert_job(cur, job_type, payload, priority, depends_on)
+
+    def enqueue_pipeline(
+        self,
+        stages: list[list[tuple[str, dict[str, Any] | None]]],
+        priority: int = 0,
+    ) -> list[list[int]]:
+        """
+        Submit a pipeline of jobs in a single transaction.
+
+        Every job depends on all jobs of the previous stage. Jobs within a
+        stage are independent and run concurrently, on any worker, once the
+        previous stage completed. If a job fails for good, the rest of its
+        branch fails with it.
+
+        Example:
+            ```python
+            queue.enqueue_pipeline([
+                [("load_dataset", {"dataset_input": "s3://bag/bag.gpkg"})],
+                [("refresh_models", {"skip_statistics": True})],
+                [("refresh_models", {"view": view}) for view in views]
+                + [("process_mapset", {"tileset": tileset}) for tileset in tilesets],
+            ])
+            ```
+
+        Args:
+            stages: The stages of the pipeline as lists of (job_type, payload)
+            priority: Priority of every job in the pipeline
+
+        Returns:
+            The IDs of the submitted jobs, per stage
+        """
+        self.logger.debug(f"Submitting pipeline of {len(stages)} stage(s)")
+
+        job_ids: list[list[int]] = []
+        with self._sdk.db as db:
+            db.db.autocommit = False
+            with db.db, db.db.cursor() as cur:
+                depends_on: list[int] = []
+                for stage in stages:
+                    depends_on = [
+                        self._insert_job(cur, job_type, payload, priority, depends_on)
+                        for job_type, payload in stage
+                    ]
+                    job_ids.append(depends_on)
+
+        return job_ids
+
+    def listen(self, channel: str = NOTIFY_CHANNEL):
+        """
+        Open a dedicated connection that LISTENs for new job notifications.
+
+        Notifications carry the job type as payload and are delivered by the
+        insert trigger in sql/queue/create_worker_queue.sql. The caller owns
+        the returned connection and is responsible for closing it.
+
+        Args:
+            channel: The notification channel to listen on
+
+        Returns:
+            An autocommit psycopg2 connection with LISTEN active
+        """
+        self.logger.debug(f"Listening for job notifications on '{channel}'")
+
+        connection = self._sdk.db.connect()
+        try:
+            with connection.cursor() as cur:
+                cur.execute(f'LISTEN "{channel}";')
+        except Exception:
+            connection.close()
+            raise
+
+        return connection
+
+    def heartbeat(self, job_ids: list[int]) -> list[int]:
+        """
+        Renew the lease on jobs held by this worker.
+
+        Args:
+            job_ids: The IDs of the jobs this worker is running
+
+        Returns:
+            The IDs of the jobs whose lease was renewed; any other job is no
+            longer leased to this worker
+        """
+        if not job_ids:
+            return []
+
+        with self._sdk.db as db, db.db.cursor() as cur:
+            query = """
+                UPDATE application.worker_jobs
+                SET lease_expires_at = NOW() + %(lease_duration)s * INTERVAL '1 second'
+                WHERE
+                    (id = ANY(%(job_ids)s) OR coalesced_into = ANY(%(job_ids)s))
+                    AND status = 'processing'
+                    AND claimed_by = %(worker_id)s
+                RETURNING COALESCE(coalesced_into, id)
+            """
+            cur.execute(
+                query,
+                {
+                    "lease_duration": self.lease_duration,
+                    "job_ids": list(job_ids),
+                    "worker_id": self.worker_id,
+                },
+            )
+            return list({row[0] for row in cur.fetchall()})
+
+    def reclaim_expired(self) -> list[tuple[int, str]]:
+        """
+        Return jobs with an expired lease to the queue.
+
+        An expired lease counts as a failed attempt: the job is rescheduled
+        with the same exponential backoff as other failures, or marked failed
+        when it has no retries left.
+
+        Returns:
+            List of (job_id, new_status) tuples for the reclaimed jobs
+        """
+        with self._sdk.db as db, db.db.cursor() as cur:
+            query = """
+                WITH expired AS (
+                    SELECT id
+                    FROM application.worker_jobs
+                    WHERE status = 'processing' AND lease_expires_at < NOW()
+                    FOR UPDATE SKIP LOCKED
+                )
+                UPDATE application.worker_jobs AS wj
+                SET
+                    status = CASE
+                        WHEN wj.max_retries = 0 OR wj.retry_count < wj.max_retries
+                        THEN 'pending' ELSE 'failed'
+                    END,
+                    retry_count = wj.retry_count + 1,
+                    last_error = 'Lease expired, worker ' || COALESCE(wj.claimed_by, 'unknown') || ' stopped responding',
+                    process_after = CASE
+                        WHEN wj.max_retries = 0 OR wj.retry_count < wj.max_retries
+                        THEN NOW() + 30 * power(2, wj.retry_count) * INTERVAL '1 second'
+                    END,
+                    coalesced_into = NULL,
+                    claimed_by = NULL,
+                    lease_expires_at = NULL,
+                    updated_at = NOW()
+                FROM expired
+                WHERE wj.id = expired.id
+                RETURNING wj.id, wj.status
+            """
+            cur.execute(query)
+            return cur.fetchall()
+
+    def release(self, job_ids: list[int]) -> list[int]:
+        """
+        Return jobs held by this worker to the queue without counting an attempt.
+
+        Used on shutdown for jobs that did not finish in time. The jobs and the
+        jobs coalesced into them become pending right away, so another worker
+        can pick them up without waiting for their lease to expire.
+
+        Args:
+            job_ids: IDs of the jobs to release
+
+        Returns:
+            The IDs of the released jobs, including coalesced jobs
+        """
+        if not job_ids:
+            return []
+
+        with self._sdk.db as db, db.db.cursor() as cur:
+            # Wake up other workers, as for newly inserted jobs
+            query = """
+                WITH released AS (
+                    UPDATE application.worker_jobs
+                    SET
+                        status = 'pending',
+                        process_after = NULL,
+                        coalesced_into = NULL,
+                        claimed_by = NULL,
+                        lease_expires_at = NULL,
+                        updated_at = NOW()
+                    WHERE
+                        (id = ANY(%(job_ids)s) OR coalesced_into = ANY(%(job_ids)s))
+                        AND claimed_by = %(worker_id)s
+                        AND status = 'processing'
+                    RETURNING id, job_type
+                )
+                SELECT id, pg_notify(%(channel)s, job_type)
+                FROM released
+            """
+            cur.execute(
+                query,
+                {
+                    "job_ids": job_ids,
+                    "worker_id": self.worker_id,
+                    "channel": NOTIFY_CHANNEL,
+                },
+            )
+            return [row[0] for row in cur.fetchall()]
+
+    def depth(self) -> list[tuple[str, str, int]]:
+        """
+        Count the jobs that are not completed, by job type and status.
+
+        Completed jobs are left out: they are history rather than backlog, and
+        they make up most of the table.
+
+        Returns:
+            List of (job_type, status, count) tuples
+        """
+        with self._sdk.db as db, db.db.cursor() as cur:
+            query = """
+                SELECT job_type, status, count(*)
+                FROM application.worker_jobs
+                WHERE status <> 'completed'
+                GROUP BY job_type, status
+            """
+            cur.execute(query)
+            return cur.fetchall()
+
+    def finish(
+        self, outcomes: list[tuple[int, bool, str | None, bool]]
+    ) -> dict[int, str]:
+        """
+        Record the outcome of any number of jobs in a single UPDATE.
+
+        The new status, retry count and backoff are computed in SQL from each
+        job's current retry information: a failed job with retries left goes
+        back to 'pending' with an exponential backoff of 30s, 1m, 2m, etc.
+        Jobs coalesced into a job share its new status; only the job that
+        actually ran has its retry count incremented.
+
+        Args:
+            outcomes: List of (job_id, succeeded, error, retry) tuples, where
+                retry tells whether a failed job may be retried
+
+        Returns:
+            The new status per job ID; jobs no longer leased to this worker
+            are left out
+        """
+        if not outcomes:
+            return {}
+
+        job_ids, succeeded, errors, retry = (
+            list(column) for column in zip(*outcomes, strict=True)
+        )
+
+        with self._sdk.db as db, db.db.cursor() as cur:
+            query = """
+                WITH outcome AS (
+                    SELECT
+                        o.job_id,
+                        o.error,
+                        j.retry_count,
+                        CASE
+                            WHEN o.succeeded THEN 'completed'
+                            WHEN o.retry AND (j.max_retries = 0 OR j.retry_count < j.max_retries)
+                            THEN 'pending'
+                            ELSE 'failed'
+                        END AS status
+                    FROM unnest(
+                        %(job_ids)s::bigint[],
+                        %(succeeded)s::boolean[],
+                        %(errors)s::text[],
+                        %(retry)s::boolean[]
+                    ) AS o(job_id, succeeded, error, retry)
+                    JOIN application.worker_jobs AS j ON j.id = o.job_id
+                )
+                UPDATE application.worker_jobs AS wj
+                SET
+                    status = outcome.status,
+                    retry_count = CASE
+                        WHEN wj.id = outcome.job_id AND outcome.status <> 'completed'
+                        THEN wj.retry_count + 1 ELSE wj.retry_count
+                    END,
+                    last_error = CASE
+                        WHEN outcome.status = 'completed' THEN wj.last_error ELSE outcome.error
+                    END,
+                    process_after = CASE outcome.status
+                        WHEN 'completed' THEN wj.process_after
+                        WHEN 'pending'
+                        THEN NOW() + 30 * power(2, outcome.retry_count) * INTERVAL '1 second'
+                    END,
+                    coalesced_into = CASE
+                        WHEN outcome.status = 'pending' THEN NULL ELSE wj.coalesced_into
+                    END,
+                    claimed_by = NULL,
+                    lease_expires_at = NULL,
+                    updated_at = NOW()
+                FROM outcome
+                WHERE (wj.id = outcome.job_id OR wj.coalesced_into = outcome.job_id)
+                    AND wj.claimed_by = %(worker_id)s
+                RETURNING outcome.job_id, outcome.status, outcome.retry_count + 1
+            """
+            cur.execute(
+                query,
+                {
+                    "job_ids": job_ids,
+                    "succeeded": succeeded,
+                    "errors": errors,
+                    "retry": retry,
+                    "worker_id": self.worker_id,
+                },
+            )
+            rows = cur.fetchall()
+
+        statuses = {}
+        for job_id, status, attempt in rows:
+            if status == "pending" and job_id not in statuses:
+                self.logger.info(
+                    f"Scheduled job {job_id} for retry (attempt {attempt})"
+                )
+            statuses[job_id] = status
+
+        for job_id in job_ids:
+            if job_id not in statuses:
+                self.logger.warning(f"Job {job_id} is no longer leased to this worker")
+
+        return statuses
+
+    def record_runs(self, runs: list[JobRun]) -> None:
+        """
+        Store the timing records of finished job runs.
+
+        Args:
+            runs: The job runs to store in application.worker_job_runs
+        """
+        if not runs:
+            return
+
+        with self._sdk.db as db, db.db.cursor() as cur:
+            query = """
+                INSERT INTO application.worker_job_runs (
+                    job_id,
+                    job_type,
+                    attempt,
+                    worker,
+                    started_at,
+                    queue_wait,
+                    run_time,
+                    exit_reason,
+                    error,
+                    bytes_moved,
+                    stages
+                )
+                VALUES %s
+            """
+            execute_values(
+                cur,
+                query,
+                [
+                    (
+                        run.job_id,
+                        run.job_type,
+                        run.attempt,
+                        self.worker_id,
+                        run.started_at,
+                        run.queue_wait,
+                        run.run_time,
+                        run.exit_reason,
+                        run.error,
+                        run.bytes_moved,
+                        Json([stage.as_dict() for stage in run.stages]),
+                    )
+                    for run in runs
+                ],
+            )
+
+    def complete(self, job_id: int) -> None:
+        """
+        Mark a job and the jobs coalesced into it as completed.
+
+        Args:
+            job_id: The ID of the job to update
+        """
+        self.finish([(job_id, True, None, False)])
+
+    def fail(self, job_id: int, error: str, retry: bool = True) -> str | None:
+        """
+        Mark a job as failed, potentially scheduling a retry.
+
+        Jobs coalesced into this job share its new status. Only the job that
+        actually ran has its retry count incremented.
+
+        Args:
+            job_id: The ID of the job to update
+            error: The error message
+            retry: Whether to retry the job if retries are available
+
+        Returns:
+            The new job status, 'pending' when a retry was scheduled or
+            'failed', or None if the job could not be updated
+        """
+        return self.finish([(job_id, False, error, retry)]).get(job_id)
@@ -1,9 +1,12 @@
 import logging
+import threading
 from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 import boto3
 import boto3.session
 
+from fundermapsworker import telemetry
 from fundermapsworker.config import S3Config
 
 logger = logging.getLogger(__name__)
@@ -16,6 +19,9 @@ class ObjectStorageProvider:
         self.client = None
         self.logger = logger
 
+        # The client is shared by every thread, boto3 clients are thread-safe
+        self._client_lock = threading.Lock()
+
     def upload_file(self, file_path: str, key: str, bucket: None | str = None, *args):
         """
         Uploads a file to the specified key in the storage bucket.
@@ -35,6 +41,7 @@ class ObjectStorageProvider:
         self.logger.debug(f"Uploading file {file_path} to {key}")
 
         self.client.upload_file(file_path, bucket or self.config.bucket, key, *args)
+        telemetry.record_bytes(Path(file_path).stat().st_size)
 
         self.logger.debug(f"File uploaded to {key}")
 
@@ -57,6 +64,7 @@ class ObjectStorageProvider:
         self.logger.debug(f"Downloading file {key} to {file_path}")
 
         self.client.download_file(bucket or self.config.bucket, key, file_path, *args)
+        telemetry.record_bytes(Path(file_path).stat().st_size)
 
         self.logger.debug(f"File downloaded to {file_path}")
 
@@ -113,7 +121,6 @@ class ObjectStorageProvider:
             Exception: If not all files were successfully uploaded.
         """
         import os
-        import threading
         from pathlib import Path, PurePosixPath
 
         file_paths = []
@@ -121,8 +128,9 @@ class ObjectStorageProvider:
             for file in files:
                 file_paths.append(Path(root) / file)
 
-        self._upload_count = 0
-        self._upload_count_lock = threading.Lock()
+        # Local, concurrent uploads of other directories share this provider
+        upload_count = 0
+        upload_count_lock = threading.Lock()
 
         def _upload_file(local_path):
             rel_path = os.path.relpath(local_path, directory_path)
@@ -131,38 +139,45 @@ class ObjectStorageProvider:
             self.client.upload_file(
                 local_path, bucket or self.config.bucket, s3_key, extra_args
             )
-            with self._upload_count_lock:
-                self._upload_count += 1
+            nonlocal upload_count
+            with upload_count_lock:
+                upload_count += 1
 
         max_threads = 10
         with ThreadPoolExecutor(max_workers=max_threads) as executor:
             executor.map(_upload_file, file_paths)
 
-        if self._upload_count != len(file_paths):
+        if upload_count != len(file_paths):
             raise Exception("Failed to upload all files")
 
+        # Recorded here, the upload threads do not share the job's context
+        telemetry.record_bytes(sum(path.stat().st_size for path in file_paths))
+
         self.logger.debug(
-            f"Uploaded {self._upload_count} files from directory {directory_path}",
+            f"Uploaded {upload_count} files from directory {directory_path}",
         )
 
     def __enter__(self):
         """
-        Context manager entry point. Initializes S3 client connection.
+        Context manager entry point. Initializes the S3 client connection on
+        first use, later entries reuse it.
 
         Returns:
             ObjectStorageProvider: The initialized storage provider instance.
         """
-        self.logger.debug("Connecting to S3")
-
-        session = boto3.session.Session()
-        self.client = session.client(
-            "s3",
-            endpoint_url=self.config.service_uri,
-            aws_access_key_id=self.config.access_key,
-            aws_secret_access_key=self.config.secret_key,
-        )
-
-        self.logger.debug("Connected to S3")
+        with self._client_lock:
+            if self.client is None:
+                self.logger.debug("Connecting to S3")
+
+                session = boto3.session.Session()
+                self.client = session.client(
+                    "s3",
+                    endpoint_url=self.config.service_uri,
+                    aws_access_key_id=self.config.access_key,
+                    aws_secret_access_key=self.config.secret_key,
+                )
+
+                self.logger.debug("Connected to S3")
 
         return self
 
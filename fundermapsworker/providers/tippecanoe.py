@@ -1,7 +1,8 @@
-import asyncio
 import logging
 import shutil
 
+from fundermapsworker.util import run_subprocess
+
 logger = logging.getLogger("tippecanoe")
 
 
@@ -74,22 +75,17 @@ async def tippecanoe(
     logger.debug(f"Running command: {' '.join(command)}")
 
     try:
-        process = await asyncio.create_subprocess_exec(
-            *command,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-
-        stdout, stderr = await process.communicate()
+        # Runs in its own process group so a cancelled job also stops tippecanoe
+        returncode, stdout, stderr = await run_subprocess(*command)
 
-        if process.returncode == 0:
+        if returncode == 0:
             logger.debug(f"Command succeeded: {stdout.decode().strip()}")
         else:
             error_msg = stderr.decode().strip()
             logger.error(f"Command failed: {error_msg}")
             raise Exception(f"Tippecanoe command failed: {error_msg}")
 
-        return process.returncode == 0
+        return returncode == 0
     except Exception as e:
         logger.exception(f"Error running tippecanoe: {str(e)}")
         raise
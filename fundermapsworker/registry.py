@@ -0,0 +1,273 @@
+"""
+Job handler registry for the FunderMaps worker.
+
+This module maps worker job types to the command that runs them and describes
+how a job payload translates into command arguments.
+"""
+
+import argparse
+import importlib
+import logging
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+from fundermapsworker.command import WorkerCommand
+from fundermapsworker.load import adaptive_default
+
+logger = logging.getLogger(__name__)
+
+
+def _as_list(value: Any) -> list:
+    """Accept a single value or a list of values; an empty value means none."""
+    if isinstance(value, list):
+        return value
+    return [value] if value else []
+
+
+def _as_recipients(value: Any) -> Any:
+    """Accept a single address, a list of addresses or a mapping to variables."""
+    return [value] if isinstance(value, str) else value
+
+
+def _adaptive(value: Any) -> bool:
+    """Follow FUNDERMAPS_ADAPTIVE unless the payload says otherwise."""
+    return adaptive_default() if value is None else bool(value)
+
+
+@dataclass(frozen=True)
+class PayloadField:
+    """
+    A job payload field passed to the command as an argument.
+
+    Attributes:
+        name: The payload key, also used as the argument name
+        required: Whether a missing or empty value fails the job
+        default: Value used when the payload does not contain the field
+        convert: Optional function applied to the value, including the default
+    """
+
+    name: str
+    required: bool = False
+    default: Any = None
+    convert: Callable[[Any], Any] | None = None
+
+
+@dataclass(frozen=True)
+class JobHandler:
+    """
+    Declarative description of how a job type is run.
+
+    Attributes:
+        job_type: The job type handled
+        command: Import path of the command class, as "module:ClassName"
+        fields: Payload fields passed to the command as arguments
+        arguments: Fixed command arguments that are not read from the payload
+        follow_up: Job types submitted after a job of this type succeeds
+    """
+
+    job_type: str
+    command: str
+    fields: tuple[PayloadField, ...] = ()
+    arguments: dict[str, Any] = field(default_factory=dict)
+    follow_up: tuple[str, ...] = ()
+
+    def build_args(self, payload: dict[str, Any]) -> argparse.Namespace:
+        """
+        Build the command arguments for a job payload.
+
+        Raises:
+            ValueError: If a required field is missing from the payload
+        """
+        args = argparse.Namespace(**self.arguments)
+        for payload_field in self.fields:
+            value = payload.get(payload_field.name, payload_field.default)
+            if payload_field.required and not value:
+                raise ValueError(
+                    f"Missing required field '{payload_field.name}' in job payload"
+                )
+            if payload_field.convert is not None:
+                value = payload_field.convert(value)
+            setattr(args, payload_field.name, value)
+        return args
+
+
+JOB_HANDLERS: tuple[JobHandler, ...] = (
+    JobHandler(
+        job_type="refresh_models",
+        command="fundermapsworker.commands.refresh_models:ModelRefreshCommand",
+        fields=(
+            PayloadField("skip_risk", default=False),
+            PayloadField("skip_statistics", default=False),
+            PayloadField("view"),
+            PayloadField("parallel", default=1),
+            PayloadField("force", default=False),
+        ),
+        # Submitting process_mapset rather than running it inline lets it
+        # coalesce with the job inserted by data.refresh_all(), so tiles are
+        # rebuilt only once.
+        follow_up=("process_mapset",),
+    ),
+    JobHandler(
+        job_type="load_dataset",
+        command="fundermapsworker.commands.load_dataset:LoadDatasetCommand",
+        fields=(
+            PayloadField("dataset_input", required=True),
+            PayloadField("layer", convert=_as_list),
+            PayloadField("delete_after", default=False),
+            PayloadField("tmp_dir"),
+        ),
+    ),
+    JobHandler(
+        job_type="process_mapset",
+        command="fundermapsworker.commands.process_mapset:ProcessMapsetCommand",
+        fields=(
+            PayloadField("tileset", convert=_as_list),
+            PayloadField("max_workers", default=3),
+            PayloadField("min_workers", default=1),
+            PayloadField("adaptive", convert=_adaptive),
+        ),
+    ),
+    JobHandler(
+        job_type="cleanup_storage",
+        command="fundermapsworker.commands.cleanup_storage:CleanupStorageCommand",
+    ),
+    JobHandler(
+        job_type="export_product",
+        command="fundermapsworker.commands.export_product:ProductExportCommand",
+        fields=(PayloadField("date"),),
+    ),
+    JobHandler(
+        job_type="generate_pdf",
+        command="fundermapsworker.commands.generate_pdf:PDFGenerateCommand",
+        fields=(PayloadField("url"),),
+        arguments={"output_dir": "./pdfs"},  # TODO: This is a hack
+    ),
+    JobHandler(
+        job_type="send_mail",
+        command="fundermapsworker.commands.send_mail:SendMailCommand",
+        fields=(
+            PayloadField("to", required=True),
+            PayloadField("subject", required=True),
+            PayloadField("text", required=True),
+        ),
+    ),
+    JobHandler(
+        job_type="send_bulk_mail",
+        command="fundermapsworker.commands.send_bulk_mail:SendBulkMailCommand",
+        fields=(
+            # A list of addresses, or an object mapping addresses to variables
+            PayloadField("recipients", required=True, convert=_as_recipients),
+            PayloadField("subject", required=True),
+            PayloadField("text", required=True),
+        ),
+    ),
+    JobHandler(
+        job_type="run_sql",
+        command="fundermapsworker.commands.run_sql:RunSqlCommand",
+        fields=(
+            # Groups of independent scripts, as lists or comma separated strings
+            PayloadField("scripts", required=True, convert=_as_list),
+            PayloadField("parallel", default=1),
+            PayloadField("force", default=False),
+        ),
+    ),
+)
+
+
+class JobRegistry:
+    """
+    Runs jobs with the command registered for their job type.
+
+    Command classes are imported once, by `load` at startup. Command instances are kept
+    after a job finishes and reused by the next job of the same type, already
+    bound to the worker's SDK instance and its initialized providers. Every
+    running job gets its own instance, so concurrent jobs never share
+    arguments.
+
+    Attributes:
+        fundermaps: The SDK instance commands run against
+        logger: The logger commands log to
+    """
+
+    def __init__(self, fundermaps, handlers: Iterable[JobHandler] = JOB_HANDLERS):
+        self.fundermaps = fundermaps
+        self.logger = logger
+        self._handlers = {handler.job_type: handler for handler in handlers}
+        self._commands: dict[str, type[WorkerCommand]] = {}
+        self._idle: dict[str, list[WorkerCommand]] = {}
+
+    @property
+    def job_types(self) -> list[str]:
+        return list(self._handlers)
+
+    def handler(self, job_type: str) -> JobHandler:
+        """
+        Look up the handler for a job type.
+
+        Raises:
+            ValueError: If no handler is registered for the job type
+        """
+        try:
+            return self._handlers[job_type]
+        except KeyError:
+            raise ValueError(f"Unknown job type: {job_type}") from None
+
+    def register(self, handler: JobHandler) -> None:
+        """Register a handler, replacing any handler for the same job type."""
+        self._handlers[handler.job_type] = handler
+        self._commands.pop(handler.job_type, None)
+        self._idle.pop(handler.job_type, None)
+
+    def load(self) -> None:
+        """Import every command class and warm one command instance per job type."""
+        for handler in self._handlers.values():
+            if not self._idle.get(handler.job_type):
+                self._checkin(handler, self._checkout(handler))
+
+    def _command_class(self, handler: JobHandler) -> type[WorkerCommand]:
+        command_class = self._commands.get(handler.job_type)
+        if command_class is None:
+            module_name, _, class_name = handler.command.partition(":")
+            command_class = getattr(importlib.import_module(module_name), class_name)
+            self._commands[handler.job_type] = command_class
+            self.logger.debug(f"Loaded {class_name} for {handler.job_type} jobs")
+        return command_class
+
+    def _checkout(self, handler: JobHandler) -> WorkerCommand:
+        idle = self._idle.setdefault(handler.job_type, [])
+        if idle:
+            return idle.pop()
+
+        command = self._command_class(handler)()
+        command.fundermaps = self.fundermaps
+        command.logger = self.logger
+        return command
+
+    def _checkin(self, handler: JobHandler, command: WorkerCommand) -> None:
+        command.args = None
+        self._idle.setdefault(handler.job_type, []).append(command)
+
+    async def run(self, job_type: str, payload: dict[str, Any]) -> bool:
+        """
+        Run a job with the command registered for its type.
+
+        Args:
+            job_type: The job type
+            payload: The job payload
+
+        Returns:
+            True if the command succeeded, False otherwise
+
+        Raises:
+            ValueError: If the job type is unknown or the payload is invalid
+        """
+        handler = self.handler(job_type)
+        args = handler.build_args(payload)
+
+        command = self._checkout(handler)
+        try:
+            command.args = args
+            return await command.execute() == 0
+        finally:
+            self._checkin(handler, command)
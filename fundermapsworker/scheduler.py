@@ -0,0 +1,214 @@
+"""
+Job scheduling for the FunderMaps worker.
+
+This module tracks which jobs occupy the worker's concurrency slots and decides
+how many jobs of each type may be claimed next.
+"""
+
+from collections import Counter
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+# Named resource weights accepted in job class specifications
+WEIGHT_CLASSES: dict[str, int] = {
+    "light": 1,
+    "io-heavy": 2,
+    "cpu-heavy": 4,
+}
+
+
+@dataclass
+class JobClass:
+    """
+    Concurrency settings for a single job type.
+
+    Attributes:
+        job_type: The job type these settings apply to
+        limit: Maximum number of jobs of this type running at once
+        weight: Number of worker slots a single job of this type occupies
+    """
+
+    job_type: str
+    limit: int
+    weight: int = 1
+
+    @classmethod
+    def parse(cls, spec: str) -> "JobClass":
+        """
+        Parse a job class specification of the form TYPE=LIMIT[:WEIGHT].
+
+        The weight is either a positive integer or one of the names in
+        WEIGHT_CLASSES, e.g. `process_mapset=1:cpu-heavy` or `send_mail=20`.
+
+        Raises:
+            ValueError: If the specification is malformed
+        """
+        job_type, sep, value = spec.partition("=")
+        if not sep or not job_type:
+            raise ValueError(
+                f"Invalid job class '{spec}', expected TYPE=LIMIT[:WEIGHT]"
+            )
+
+        limit, _, weight = value.partition(":")
+        try:
+            job_class = cls(
+                job_type=job_type,
+                limit=int(limit),
+                weight=WEIGHT_CLASSES.get(weight) or int(weight or 1),
+            )
+        except ValueError as e:
+            raise ValueError(f"Invalid job class '{spec}': {e}") from e
+
+        if job_class.limit < 1 or job_class.weight < 1:
+            raise ValueError(
+                f"Invalid job class '{spec}', limit and weight must be positive"
+            )
+
+        return job_class
+
+
+@dataclass
+class ClaimRequest:
+    """
+    A single claim against the job queue.
+
+    Attributes:
+        limit: Maximum number of jobs to claim
+        job_types: Job types to claim, or None for any type
+        exclude_types: Job types that must not be claimed
+    """
+
+    limit: int
+    job_types: list[str] | None = None
+    exclude_types: list[str] | None = None
+
+
+class SlotScheduler:
+    """
+    Weighted slot accounting with per-job-type limits.
+
+    The worker has `capacity` slots. Every running job occupies as many slots
+    as its job class weight, and job types with a job class never run more
+    than their limit at once. Job types without a job class weigh one slot
+    and are only bounded by the capacity.
+
+    Raises:
+        ValueError: If a job class weighs more than the capacity, as its jobs
+            could never be claimed
+    """
+
+    def __init__(self, capacity: int, job_classes: list[JobClass] | None = None):
+        self.capacity = capacity
+        self.job_classes = {jc.job_type: jc for jc in job_classes or []}
+        self._running: Counter[str] = Counter()
+
+        for job_class in self.job_classes.values():
+            if job_class.weight > capacity:
+                raise ValueError(
+                    f"Job type {job_class.job_type} weighs {job_class.weight} slots,"
+                    f" more than the worker's {capacity}; raise --max-concurrent"
+                    " or lower its weight"
+                )
+
+    @property
+    def max_weight(self) -> int:
+        """The weight of the heaviest job type."""
+        return max((jc.weight for jc in self.job_classes.values()), default=1)
+
+    def weight(self, job_type: str) -> int:
+        job_class = self.job_classes.get(job_type)
+        return job_class.weight if job_class else 1
+
+    @property
+    def used(self) -> int:
+        """The number of slots occupied by running jobs."""
+        return sum(self.weight(t) * n for t, n in self._running.items())
+
+    @property
+    def free(self) -> int:
+        """The number of unoccupied slots."""
+        return max(0, self.capacity - self.used)
+
+    def running(self, job_type: str | None = None) -> int:
+        """The number of running jobs, optionally of a single job type."""
+        if job_type is None:
+            return sum(self._running.values())
+        return self._running[job_type]
+
+    def running_by_type(self) -> dict[str, int]:
+        """The number of running jobs per job type."""
+        return dict(self._running)
+
+    def acquire(self, job_type: str) -> None:
+        self._running[job_type] += 1
+
+    def release(self, job_type: str) -> None:
+        self._running[job_type] -= 1
+        if self._running[job_type] <= 0:
+            del self._running[job_type]
+
+    def _classes(self, job_types: list[str] | None) -> list[JobClass]:
+        return [
+            jc
+            for jc in self.job_classes.values()
+            if not job_types or jc.job_type in job_types
+        ]
+
+    def _blocked(self, job_class: JobClass) -> bool:
+        return (
+            self._running[job_class.job_type] < job_class.limit
+            and self.free < job_class.weight
+        )
+
+    def blocked_types(self, job_types: list[str] | None = None) -> list[str]:
+        """Job types below their limit whose weight does not fit the free slots."""
+        return [jc.job_type for jc in self._classes(job_types) if self._blocked(jc)]
+
+    def claim_requests(
+        self, job_types: list[str] | None = None, waiting: str | None = None
+    ) -> Iterator[ClaimRequest]:
+        """
+        Yield the claims needed to fill the free slots.
+
+        Job types with a job class are claimed first, heaviest first, so heavy
+        jobs get a slot as soon as one fits; the remaining slots are then
+        filled with any other job type. Requests are computed lazily, so jobs
+        acquired between iterations are taken into account.
+
+        If the first pending job in claim order is of a type that does not fit
+        the free slots, nothing is claimed: the free slots are held until
+        enough running jobs finish for it. Otherwise a steady stream of
+        lighter jobs could keep a heavy job waiting forever. Since claim order
+        ages by waiting time, every heavy job eventually comes first.
+
+        Args:
+            job_types: Optional list of job types the worker processes
+            waiting: Job type of the first pending job in claim order, if
+                known; only needed when `blocked_types` is not empty
+        """
+        job_class = self.job_classes.get(waiting) if waiting else None
+        if job_class is not None and self._blocked(job_class):
+            return
+
+        classes = sorted(
+            self._classes(job_types), key=lambda jc: jc.weight, reverse=True
+        )
+
+        for job_class in classes:
+            limit = min(
+                job_class.limit - self._running[job_class.job_type],
+                self.free // job_class.weight,
+            )
+            if limit > 0:
+                yield ClaimRequest(limit, job_types=[job_class.job_type])
+
+        if self.free <= 0:
+            return
+
+        configured = list(self.job_classes)
+        if job_types:
+            remaining = [t for t in job_types if t not in self.job_classes]
+            if remaining:
+                yield ClaimRequest(self.free, job_types=remaining)
+        else:
+            yield ClaimRequest(self.free, exclude_types=configured or None)
@@ -0,0 +1,419 @@
+"""
+SQL script runner for the FunderMaps worker.
+
+This module splits the scripts in the top-level sql/ directory into
+statements, runs them one by one with timings, and records the checksum of
+every applied script in the database. Idempotent scripts whose checksum did
+not change since they were last applied are skipped, so deploys and reloads
+only pay for the scripts that changed.
+
+A script is idempotent when its header says so, with the line
+
+    -- Run this file idempotently: CREATE OR REPLACE throughout.
+
+Scripts without their own BEGIN/COMMIT run in a single transaction, together
+with the update of their recorded checksum, like a multi-statement script
+sent in one query would.
+
+Examples:
+    ```python
+    runner = SqlScriptRunner(fundermaps.adb)
+
+    # Independent scripts in a group run concurrently, groups run in order
+    await runner.run_all(
+        [
+            ["model/create_helper_functions", "model/create_building_precomputed"],
+            ["model/create_matview_refresh_state"],
+            ["model/create_refresh_all"],
+        ],
+        parallel=2,
+    )
+    ```
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from fundermapsworker import telemetry
+
+logger = logging.getLogger(__name__)
+
+# Header line marking a script as safe to skip when unchanged
+IDEMPOTENT_MARKER: str = "-- Run this file idempotently"
+
+# psql meta-commands that only print or time and can be ignored
+IGNORED_META_COMMANDS: tuple[str, ...] = ("echo", "qecho", "timing")
+
+# Applied scripts, keyed by their path relative to the sql/ directory
+CREATE_STATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS application.sql_script_state (
+        script text PRIMARY KEY,
+        checksum text NOT NULL,
+        statement_count integer NOT NULL,
+        duration double precision NOT NULL,
+        applied_at timestamptz NOT NULL DEFAULT NOW()
+    )"""
+
+SELECT_CHECKSUM = """
+    SELECT checksum
+    FROM application.sql_script_state
+    WHERE script = %s"""
+
+RECORD_SCRIPT = """
+    INSERT INTO application.sql_script_state
+        (script, checksum, statement_count, duration, applied_at)
+    VALUES (%s, %s, %s, %s, NOW())
+    ON CONFLICT (script) DO UPDATE
+    SET
+        checksum = EXCLUDED.checksum,
+        statement_count = EXCLUDED.statement_count,
+        duration = EXCLUDED.duration,
+        applied_at = EXCLUDED.applied_at"""
+
+_DOLLAR_QUOTE = re.compile(r"\$([A-Za-z_][A-Za-z0-9_]*)?\$")
+_TRANSACTION_CONTROL = re.compile(
+    r"(BEGIN|COMMIT|ROLLBACK|ABORT|END|START\s+TRANSACTION)\b", re.IGNORECASE
+)
+
+
+@dataclass(frozen=True)
+class Statement:
+    """
+    A single statement of a SQL script.
+
+    Attributes:
+        sql: The statement, without leading comments and the closing semicolon
+        line: Line of the script the statement starts on
+    """
+
+    sql: str
+    line: int
+
+    @property
+    def summary(self) -> str:
+        """The first line of the statement, shortened for logging."""
+        first_line = self.sql.split("\n", 1)[0].strip()
+        return first_line if len(first_line) <= 60 else first_line[:57] + "..."
+
+
+def split_statements(script: str) -> list[Statement]:
+    """
+    Split a SQL script into statements.
+
+    Semicolons inside string literals, quoted identifiers, dollar quoted
+    bodies and comments do not end a statement. Lines starting with a psql
+    meta-command are skipped when the command only prints or times.
+
+    Args:
+        script: The SQL script
+
+    Returns:
+        The statements of the script, in order
+
+    Raises:
+        ValueError: On other psql meta-commands, which only psql can run, e.g. \\i
+    """
+
+    statements: list[Statement] = []
+    start: int | None = None
+    i = 0
+    length = len(script)
+
+    def line_at(pos: int) -> int:
+        return script.count("\n", 0, pos) + 1
+
+    def end_statement(end: int) -> None:
+        nonlocal start
+        if start is not None:
+            statements.append(Statement(script[start:end].rstrip(), line_at(start)))
+        start = None
+
+    while i < length:
+        char = script[i]
+
+        if char.isspace():
+            i += 1
+        elif script.startswith("--", i):
+            newline = script.find("\n", i)
+            i = length if newline < 0 else newline + 1
+        elif script.startswith("/*", i):
+            # Block comments nest
+            depth = 0
+            while i < length:
+                if script.startswith("/*", i):
+                    depth += 1
+                    i += 2
+                elif script.startswith("*/", i):
+                    depth -= 1
+                    i += 2
+                    if depth == 0:
+                        break
+                else:
+                    i += 1
+        elif char == "\\" and start is None:
+            newline = script.find("\n", i)
+            end = length if newline < 0 else newline
+            command = script[i + 1 : end].split(maxsplit=1)[0] if end > i + 1 else ""
+            if command not in IGNORED_META_COMMANDS:
+                raise ValueError(
+                    f"Unsupported psql meta-command \\{command} on line {line_at(i)}"
+                )
+            logger.debug(f"Skipping psql meta-command on line {line_at(i)}")
+            i = end
+        elif char == ";":
+            end_statement(i)
+            i += 1
+        else:
+            if start is None:
+                start = i
+
+            if char in ("'", '"'):
+                # E'...' strings escape with backslashes, others by doubling
+                escapes = (
+                    char == "'"
+                    and i > 0
+                    and script[i - 1] in "eE"
+                    and (i < 2 or not (script[i - 2].isalnum() or script[i - 2] == "_"))
+                )
+                i += 1
+                while i < length:
+                    if escapes and script[i] == "\\":
+                        i += 2
+                    elif script[i] == char:
+                        if script.startswith(char * 2, i):
+                            i += 2
+                        else:
+                            break
+                    else:
+                        i += 1
+                i += 1
+            elif char == "$" and (match := _DOLLAR_QUOTE.match(script, i)):
+                # $1 parameters and identifiers containing $ are not quotes
+                if i > 0 and (script[i - 1].isalnum() or script[i - 1] == "_"):
+                    i += 1
+                    continue
+                close = script.find(match.group(0), match.end())
+                i = length if close < 0 else close + len(match.group(0))
+            else:
+                i += 1
+
+    end_statement(length)
+    return statements
+
+
+@dataclass(frozen=True)
+class SqlScript:
+    """
+    A SQL script from the sql/ directory.
+
+    Attributes:
+        name: Path of the script relative to the sql/ directory, without .sql
+        statements: The statements of the script
+        checksum: SHA-256 of the script contents
+        idempotent: Whether the script may be skipped when unchanged
+        transactional: Whether the script runs in a single transaction, i.e.
+            it does not manage transactions itself
+    """
+
+    name: str
+    statements: tuple[Statement, ...]
+    checksum: str
+    idempotent: bool
+    transactional: bool
+
+    @classmethod
+    def parse(cls, name: str, script: str) -> "SqlScript":
+        statements = tuple(split_statements(script))
+        return cls(
+            name=name,
+            statements=statements,
+            checksum=hashlib.sha256(script.encode()).hexdigest(),
+            idempotent=any(
+                line.startswith(IDEMPOTENT_MARKER) for line in script.splitlines()
+            ),
+            transactional=not any(
+                _TRANSACTION_CONTROL.match(statement.sql) for statement in statements
+            ),
+        )
+
+    @classmethod
+    def load(cls, directory: Path, name: str) -> "SqlScript":
+        """
+        Read and parse a script.
+
+        Args:
+            directory: The sql/ directory
+            name: Path of the script relative to `directory`, with or without .sql
+        """
+        name = name.removesuffix(".sql")
+        return cls.parse(name, (directory / f"{name}.sql").read_text())
+
+
+@dataclass
+class ScriptRun:
+    """
+    Outcome of running a SQL script.
+
+    Attributes:
+        name: The script name
+        skipped: Whether the script was skipped because it did not change
+        duration: Seconds the script took, including checking its checksum
+        timings: Seconds each statement took, in order
+    """
+
+    name: str
+    skipped: bool = False
+    duration: float = 0.0
+    timings: list[tuple[Statement, float]] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        if self.skipped:
+            return f"{self.name}: unchanged, skipped"
+
+        summary = (
+            f"{self.name}: {len(self.timings)} statement(s) in {self.duration:.2f}s"
+        )
+        if self.timings:
+            statement, duration = max(self.timings, key=lambda timing: timing[1])
+            summary += (
+                f", slowest on line {statement.line} ({duration:.2f}s):"
+                f" {statement.summary}"
+            )
+        return summary
+
+
+def should_skip(script: SqlScript, applied_checksum: str | None, force: bool) -> bool:
+    """Whether a script can be skipped given the checksum it was last applied with."""
+    return not force and script.idempotent and applied_checksum == script.checksum
+
+
+class SqlScriptRunner:
+    """
+    Runs SQL scripts statement by statement on the async database provider.
+
+    Attributes:
+        adb: The async database provider, whose `sql_directory` scripts are
+            loaded from
+        force: Run idempotent scripts even if they did not change
+    """
+
+    def __init__(self, adb, force: bool = False):
+        self.adb = adb
+        self.force = force
+        self.logger = logger
+
+        self._state_ready = False
+        self._state_lock = asyncio.Lock()
+
+    async def _ensure_state_table(self) -> None:
+        # Concurrent CREATE TABLE IF NOT EXISTS can still conflict
+        async with self._state_lock:
+            if not self._state_ready:
+                await self.adb.execute(CREATE_STATE_TABLE)
+                self._state_ready = True
+
+    async def run(self, name: str) -> ScriptRun:
+        """
+        Run a script on its own pooled connection.
+
+        Args:
+            name: Path of the script relative to the sql/ directory
+
+        Returns:
+            The outcome of the run
+        """
+
+        script = await asyncio.to_thread(SqlScript.load, self.adb.sql_directory, name)
+        await self._ensure_state_table()
+
+        run = ScriptRun(script.name)
+        start_time = time.monotonic()
+
+        with telemetry.stage(f"sql {script.name}"):
+            async with self.adb.connection() as connection:
+                async with connection.cursor() as cur:
+                    await cur.execute(SELECT_CHECKSUM, (script.name,))
+                    row = await cur.fetchone()
+
+                if should_skip(script, row[0] if row else None, self.force):
+                    run.skipped = True
+                    self.logger.info(str(run))
+                    return run
+
+                self.logger.info(
+                    f"Running SQL script {script.name}"
+                    f" ({len(script.statements)} statement(s))"
+                )
+
+                if script.transactional:
+                    async with connection.transaction():
+                        await self._execute(connection, script, run, start_time)
+                else:
+                    await self._execute(connection, script, run, start_time)
+
+        self.logger.info(str(run))
+        return run
+
+    async def _execute(self, connection, script: SqlScript, run: ScriptRun, start_time):
+        async with connection.cursor() as cur:
+            for statement in script.statements:
+                statement_start = time.monotonic()
+                await cur.execute(statement.sql)
+                duration = time.monotonic() - statement_start
+
+                run.timings.append((statement, duration))
+                self.logger.debug(
+                    f"{script.name}:{statement.line} {statement.summary}"
+                    f" ({duration:.2f}s)"
+                )
+
+            run.duration = time.monotonic() - start_time
+            await cur.execute(
+                RECORD_SCRIPT,
+                (script.name, script.checksum, len(script.statements), run.duration),
+            )
+
+    async def run_all(
+        self, groups: list[list[str]], parallel: int = 1
+    ) -> list[ScriptRun]:
+        """
+        Run groups of scripts.
+
+        Groups run in order. The scripts within a group must not depend on
+        each other; up to `parallel` of them run at once, each on its own
+        connection. A failing script fails the run after the other scripts of
+        its group finish, and later groups are not run.
+
+        Args:
+            groups: Script names per group
+            parallel: Maximum number of scripts running at once
+
+        Returns:
+            The outcome of every script, in order
+        """
+
+        semaphore = asyncio.Semaphore(max(1, parallel))
+
+        async def bounded_run(name: str) -> ScriptRun:
+            async with semaphore:
+                return await self.run(name)
+
+        runs: list[ScriptRun] = []
+        for group in groups:
+            results = await asyncio.gather(
+                *(bounded_run(name) for name in group), return_exceptions=True
+            )
+            for name, result in zip(group, results, strict=True):
+                if isinstance(result, BaseException):
+                    self.logger.error(f"SQL script {name} failed: {result}")
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+            runs.extend(results)
+
+        return runs
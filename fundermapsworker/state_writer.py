@@ -0,0 +1,154 @@
+"""
+Batched job state updates for the FunderMaps worker.
+
+This module collects job completions, failures and run timings from
+concurrently running jobs and writes them to the job queue in batches.
+"""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+from fundermapsworker.telemetry import JobRun
+
+logger = logging.getLogger(__name__)
+
+# Time an outcome waits for others to share its UPDATE with
+FLUSH_DELAY: float = 0.005  # seconds
+
+# Maximum number of outcomes written by a single UPDATE
+MAX_BATCH_SIZE: int = 500
+
+# A job outcome as accepted by JobQueueProvider.finish: (job_id, succeeded,
+# error, retry)
+Outcome = tuple[int, bool, str | None, bool]
+
+
+class JobStateWriter:
+    """
+    Buffers job outcomes and flushes them with one set-based UPDATE.
+
+    The first outcome submitted starts a short timer; every outcome submitted
+    before it fires, up to `max_batch_size`, is written together by
+    JobQueueProvider.finish. Callers await the new status of their own job,
+    just like with JobQueueProvider.complete and fail. Job run timings are
+    written along with the next batch; nobody waits for them.
+
+    Attributes:
+        queue: The job queue provider outcomes are written to
+        flush_delay: Seconds to buffer outcomes before flushing
+        max_batch_size: Number of buffered outcomes that forces a flush
+    """
+
+    def __init__(
+        self,
+        queue,
+        run_blocking: Callable[..., Awaitable],
+        flush_delay: float = FLUSH_DELAY,
+        max_batch_size: int = MAX_BATCH_SIZE,
+    ):
+        self.queue = queue
+        self.flush_delay = flush_delay
+        self.max_batch_size = max_batch_size
+        self.logger = logger
+
+        self._run_blocking = run_blocking
+        self._buffer: list[tuple[Outcome, asyncio.Future]] = []
+        self._runs: list[JobRun] = []
+        self._flush_task: asyncio.Task | None = None
+        self._flushes: set[asyncio.Task] = set()
+
+    async def complete(self, job_id: int) -> str | None:
+        """
+        Mark a job and the jobs coalesced into it as completed.
+
+        Returns:
+            The new job status, or None if the job is no longer leased to this worker
+        """
+        return await self._submit((job_id, True, None, False))
+
+    async def fail(self, job_id: int, error: str, retry: bool = True) -> str | None:
+        """
+        Mark a job as failed, potentially scheduling a retry.
+
+        Returns:
+            The new job status, or None if the job is no longer leased to this worker
+        """
+        return await self._submit((job_id, False, error, retry))
+
+    def record_run(self, run: JobRun) -> None:
+        """Store the timing record of a finished job run with the next batch."""
+        self._runs.append(run)
+        self._schedule_flush()
+
+    async def _submit(self, outcome: Outcome) -> str | None:
+        future = asyncio.get_running_loop().create_future()
+        self._buffer.append((outcome, future))
+        self._schedule_flush()
+
+        return await future
+
+    def _schedule_flush(self) -> None:
+        if len(self._buffer) + len(self._runs) >= self.max_batch_size:
+            self._start_flush()
+        elif self._flush_task is None:
+            # Tracked in _flushes too, so close() waits for it once it writes
+            self._flush_task = asyncio.create_task(self._flush_later())
+            self._flushes.add(self._flush_task)
+            self._flush_task.add_done_callback(self._flushes.discard)
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_delay)
+        self._flush_task = None
+        await self._flush(*self._take_batch())
+
+    def _start_flush(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+
+        # Keep a reference so the flush is not garbage collected mid-write
+        task = asyncio.create_task(self._flush(*self._take_batch()))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    def _take_batch(
+        self,
+    ) -> tuple[list[tuple[Outcome, asyncio.Future]], list[JobRun]]:
+        batch, self._buffer = self._buffer, []
+        runs, self._runs = self._runs, []
+        return batch, runs
+
+    async def _flush(
+        self, batch: list[tuple[Outcome, asyncio.Future]], runs: list[JobRun]
+    ) -> None:
+        if batch:
+            self.logger.debug(f"Writing {len(batch)} job outcome(s)")
+            try:
+                statuses = await self._run_blocking(
+                    self.queue.finish, [outcome for outcome, _ in batch]
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for outcome, future in batch:
+                    if not future.done():
+                        future.set_result(statuses.get(outcome[0]))
+
+        if runs:
+            # Timings are informational; losing them must not fail any job
+            try:
+                await self._run_blocking(self.queue.record_runs, runs)
+            except Exception as e:
+                self.logger.warning(f"Failed to store {len(runs)} job run(s): {e}")
+
+    async def close(self) -> None:
+        """Write any buffered outcomes and wait for running flushes."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self._flush(*self._take_batch())
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
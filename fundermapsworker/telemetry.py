@@ -0,0 +1,154 @@
+"""
+Job execution telemetry for the FunderMaps worker.
+
+This module records how long a job spends in each named stage and how many
+bytes it moves, so the worker can store a timing record for every job run.
+
+Stages are attributed to the job run of the current context. Code that is
+not running as part of a worker job can use `stage` and `record_bytes` too;
+nothing is recorded then.
+
+Examples:
+    ```python
+    from fundermapsworker import telemetry
+
+    with telemetry.stage(f"refresh {view}"):
+        await adb.refresh_materialized_view(view)
+    ```
+"""
+
+import contextlib
+import contextvars
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Any
+
+
+@dataclass
+class Stage:
+    """
+    A named, timed part of a job run.
+
+    Attributes:
+        name: The stage name, e.g. "download" or "refresh data.building_sample"
+        offset: Seconds from the start of the run until the stage started
+        duration: Seconds the stage took
+        bytes: Bytes moved during the stage
+    """
+
+    name: str
+    offset: float = 0.0
+    duration: float = 0.0
+    bytes: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "offset": round(self.offset, 3),
+            "duration": round(self.duration, 3),
+            "bytes": self.bytes,
+        }
+
+
+@dataclass
+class JobRun:
+    """
+    Timing record of a single job run.
+
+    Attributes:
+        job_id: The ID of the job
+        job_type: The job type
+        attempt: The attempt number, starting at 1
+        queue_wait: Seconds from job creation until it was claimed
+        started_at: When the run started
+        run_time: Seconds the run took
+        exit_reason: How the run ended: completed, failed, timeout or cancelled
+        error: The error message of a failed run
+        bytes_moved: Bytes downloaded and uploaded during the run
+        stages: The stages of the run, in the order they finished
+    """
+
+    job_id: int
+    job_type: str
+    attempt: int = 1
+    queue_wait: float | None = None
+    started_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+    run_time: float = 0.0
+    exit_reason: str | None = None
+    error: str | None = None
+    bytes_moved: int = 0
+    stages: list[Stage] = field(default_factory=list)
+
+    _start: float = field(default_factory=time.monotonic, repr=False)
+    # Stages of one run may finish in different threads
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self._start
+
+    def finish(self, exit_reason: str, error: str | None = None) -> None:
+        self.run_time = self.elapsed
+        self.exit_reason = exit_reason
+        self.error = error
+
+
+_current_run: contextvars.ContextVar[JobRun | None] = contextvars.ContextVar(
+    "job_run", default=None
+)
+_current_stage: contextvars.ContextVar[Stage | None] = contextvars.ContextVar(
+    "job_stage", default=None
+)
+
+
+def current_run() -> JobRun | None:
+    """The job run of the current context, if any."""
+    return _current_run.get()
+
+
+@contextlib.contextmanager
+def job_run(run: JobRun) -> Iterator[JobRun]:
+    """Attribute stages in this context to `run`."""
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
+
+
+@contextlib.contextmanager
+def stage(name: str) -> Iterator[Stage]:
+    """
+    Time a named stage of the current job run.
+
+    The stage is recorded when the block exits, also when it raises. Bytes
+    recorded inside the block are attributed to the stage.
+    """
+    run = _current_run.get()
+    current = Stage(name, offset=run.elapsed if run else 0.0)
+    token = _current_stage.set(current)
+    start = time.monotonic()
+    try:
+        yield current
+    finally:
+        current.duration = time.monotonic() - start
+        _current_stage.reset(token)
+        if run is not None:
+            with run._lock:
+                run.stages.append(current)
+
+
+def record_bytes(count: int) -> None:
+    """Add `count` bytes moved to the current stage and job run."""
+    run = _current_run.get()
+    if run is None:
+        return
+
+    with run._lock:
+        run.bytes_moved += count
+        current = _current_stage.get()
+        if current is not None:
+            current.bytes += count
@@ -1,11 +1,87 @@
+import asyncio
+import contextlib
 import gzip
+import os
 import shutil
+import signal
 from pathlib import Path
 
 import httpx
 
+from fundermapsworker import telemetry
+
 FILE_ALLOWED_EXTENSIONS = [".geojson", ".gpkg", ".shp", ".zip", ".csv"]
 FILE_MIN_SIZE: int = 1024  # 1 KB
+SUBPROCESS_GRACE_PERIOD: float = 10.0  # seconds
+
+
+async def run_subprocess(
+    *command, grace_period: float = SUBPROCESS_GRACE_PERIOD
+) -> tuple[int, bytes, bytes]:
+    """
+    Runs a command in its own process group and collects its output.
+
+    If the calling task is cancelled, for example because a job timed out, the
+    whole process group is sent SIGTERM and, if it is still running after the
+    grace period, SIGKILL. Helper processes spawned by the command are
+    terminated as well.
+
+    Args:
+        *command: The program and its arguments.
+        grace_period (float): Seconds to wait after SIGTERM before sending SIGKILL.
+
+    Returns:
+        tuple: The return code, stdout and stderr of the process.
+    """
+
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True,
+    )
+
+    try:
+        stdout, stderr = await process.communicate()
+    except asyncio.CancelledError:
+        await terminate_process_group(process, grace_period)
+        raise
+
+    return process.returncode, stdout, stderr
+
+
+async def terminate_process_group(
+    process: asyncio.subprocess.Process,
+    grace_period: float = SUBPROCESS_GRACE_PERIOD,
+):
+    """
+    Terminates a process started in its own session, including its children.
+
+    Sends SIGTERM to the process group and escalates to SIGKILL when the
+    process has not exited within the grace period.
+
+    Args:
+        process (asyncio.subprocess.Process): The process to terminate.
+        grace_period (float): Seconds to wait after SIGTERM before sending SIGKILL.
+    """
+
+    if process.returncode is not None:
+        return
+
+    with contextlib.suppress(ProcessLookupError):
+        os.killpg(process.pid, signal.SIGTERM)
+
+    try:
+        await asyncio.wait_for(process.wait(), timeout=grace_period)
+    except TimeoutError:
+        with contextlib.suppress(ProcessLookupError):
+            os.killpg(process.pid, signal.SIGKILL)
+        await process.wait()
+    finally:
+        # Never leave the group running, even if we are cancelled again
+        if process.returncode is None:
+            with contextlib.suppress(ProcessLookupError):
+                os.killpg(process.pid, signal.SIGKILL)
 
 
 async def http_download_file(url, dest_path):
@@ -31,6 +107,8 @@ async def http_download_file(url, dest_path):
             async for chunk in response.aiter_bytes():
                 file.write(chunk)
 
+    telemetry.record_bytes(dest.stat().st_size)
+
 
 # TODO: Maybe we do not need this function
 def remove_files(directory, extension):
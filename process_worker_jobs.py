@@ -2,11 +2,27 @@
 
 import argparse
 import asyncio
-import time
-from datetime import UTC, datetime
+import contextlib
+import functools
+import logging
+import os
+import signal
 from typing import Any
 
+from fundermapsworker import telemetry
 from fundermapsworker.command import WorkerCommand
+from fundermapsworker.load import HostLoadController, adaptive_default
+from fundermapsworker.metrics import MetricsRegistry
+from fundermapsworker.providers.queue import LEASE_DURATION, NOTIFY_CHANNEL
+from fundermapsworker.registry import JobRegistry
+from fundermapsworker.scheduler import JobClass, SlotScheduler
+from fundermapsworker.state_writer import JobStateWriter
+
+# Claim latency ranges from instant pickup to jobs waiting out a long backlog
+CLAIM_LATENCY_BUCKETS = (0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600, 14400, 86400)
+
+# Default time running jobs get to finish on shutdown
+DRAIN_TIMEOUT: int = 600  # seconds
 
 
 class ProcessWorkerJobsCommand(WorkerCommand):
@@ -14,6 +30,59 @@ class ProcessWorkerJobsCommand(WorkerCommand):
 
     def __init__(self):
         super().__init__(description="Process jobs from the worker_jobs table")
+        self._listener = None
+        self._wakeup: asyncio.Event | None = None
+        self._running: dict[int, asyncio.Task] = {}
+        self._scheduler: SlotScheduler | None = None
+        self.registry: JobRegistry | None = None
+        self._state_writer: JobStateWriter | None = None
+        self._stopping = False
+
+        self.metrics = MetricsRegistry(collect=self._collect_metrics)
+        self._queue_jobs = self.metrics.gauge(
+            "fundermaps_worker_queue_jobs",
+            "Jobs in the queue that are not completed, by job type and status",
+            ("job_type", "status"),
+        )
+        self._claim_latency = self.metrics.histogram(
+            "fundermaps_worker_job_claim_latency_seconds",
+            "Time from job creation until a worker claimed the job",
+            ("job_type",),
+            buckets=CLAIM_LATENCY_BUCKETS,
+        )
+        self._job_duration = self.metrics.histogram(
+            "fundermaps_worker_job_duration_seconds",
+            "Job run time, including failed and timed out runs",
+            ("job_type",),
+        )
+        self._jobs_finished = self.metrics.counter(
+            "fundermaps_worker_jobs_finished_total",
+            "Job runs by outcome: completed, failed, timeout or cancelled",
+            ("job_type", "outcome"),
+        )
+        self._job_retries = self.metrics.counter(
+            "fundermaps_worker_job_retries_total",
+            "Failed job runs that were rescheduled for a retry",
+            ("job_type",),
+        )
+        self._jobs_coalesced = self.metrics.counter(
+            "fundermaps_worker_jobs_coalesced_total",
+            "Duplicate jobs claimed along with an equivalent job",
+            ("job_type",),
+        )
+        self._jobs_running = self.metrics.gauge(
+            "fundermaps_worker_jobs_running",
+            "Jobs currently running on this worker",
+            ("job_type",),
+        )
+        self._slots_in_use = self.metrics.gauge(
+            "fundermaps_worker_slots_in_use",
+            "Concurrency slots occupied by running jobs",
+        )
+        self._slots_capacity = self.metrics.gauge(
+            "fundermaps_worker_slots_capacity",
+            "Concurrency slots available to this worker (--max-concurrent)",
+        )
 
     def add_arguments(self, parser: argparse.ArgumentParser):
         """Add command-line arguments for the command."""
@@ -23,6 +92,11 @@ class ProcessWorkerJobsCommand(WorkerCommand):
             default=30,
             help="Polling interval in seconds (default: 30)",
         )
+        parser.add_argument(
+            "--listen",
+            action="store_true",
+            help="Wake up on job insert notifications, polling only as a fallback",
+        )
         parser.add_argument(
             "--job-types",
             nargs="+",
@@ -33,7 +107,32 @@ class ProcessWorkerJobsCommand(WorkerCommand):
             "--max-concurrent",
             type=int,
             default=3,
-            help="Maximum number of concurrent jobs to process (default: 3)",
+            help="Maximum number of concurrent job slots; a job occupies as many slots as its weight (default: 3)",
+        )
+        parser.add_argument(
+            "--adaptive",
+            action=argparse.BooleanOptionalAction,
+            default=adaptive_default(),
+            help="Adjust the number of job slots between --min-concurrent and"
+            " --max-concurrent to the host's CPU load, free memory and free tmp"
+            " disk (default: FUNDERMAPS_ADAPTIVE)",
+        )
+        parser.add_argument(
+            "--min-concurrent",
+            type=int,
+            default=1,
+            help="Minimum number of job slots with --adaptive, raised to the heaviest"
+            " --job-class weight (default: 1)",
+        )
+        parser.add_argument(
+            "--job-class",
+            nargs="+",
+            type=JobClass.parse,
+            default=[],
+            metavar="TYPE=LIMIT[:WEIGHT]",
+            help="Per-job-type concurrency limit and slot weight, where WEIGHT is a number"
+            " or light (1), io-heavy (2) or cpu-heavy (4), e.g. process_mapset=1:cpu-heavy"
+            " send_mail=20:light (default: no limit, weight 1)",
         )
         parser.add_argument(
             "--run-once",
@@ -46,73 +145,240 @@ class ProcessWorkerJobsCommand(WorkerCommand):
             default=3600,
             help="Maximum job execution time in seconds (default: 3600)",
         )
+        parser.add_argument(
+            "--lease-duration",
+            type=int,
+            default=LEASE_DURATION,
+            help="Seconds a claimed job stays leased without a heartbeat; expired"
+            f" leases are reclaimed by other workers (default: {LEASE_DURATION})",
+        )
+        parser.add_argument(
+            "--drain-timeout",
+            type=int,
+            default=DRAIN_TIMEOUT,
+            help="Seconds running jobs get to finish on SIGTERM or SIGINT before they"
+            f" are released back to the queue (default: {DRAIN_TIMEOUT})",
+        )
+        parser.add_argument(
+            "--metrics-port",
+            type=int,
+            default=int(os.environ.get("FUNDERMAPS_METRICS_PORT", "0")),
+            help="Serve Prometheus metrics on this port at /metrics (default: 0, disabled)",
+        )
+        parser.add_argument(
+            "--metrics-host",
+            default=os.environ.get("FUNDERMAPS_METRICS_HOST", "127.0.0.1"),
+            help="Address to serve metrics on (default: 127.0.0.1)",
+        )
 
-    async def _get_pending_jobs(
-        self, job_types: list[str] = None
-    ) -> list[dict[str, Any]]:
+    async def pre_execute(self) -> None:
+        """Size the pools shared by all jobs and load the job handlers."""
+        db_config = self.fundermaps.db_config
+        if not db_config.pool_size:
+            # Every running job plus the claim/complete bookkeeping shares the pool
+            db_config.pool_size = self.args.max_concurrent * 2 + 2
+
+        # Blocking job stages and queue bookkeeping run in the thread pool
+        if not self.fundermaps.executor_workers:
+            self.fundermaps.executor_workers = self.args.max_concurrent * 2 + 2
+
+        self.registry = JobRegistry(self.fundermaps)
+        self.registry.logger = self.logger
+        self.registry.load()
+
+    def _start_listener(self) -> None:
+        """
+        Start listening for job notifications on the event loop.
+
+        Listens on NOTIFY_CHANNEL, the channel the triggers in
+        sql/queue/create_worker_queue.sql notify. Failures are logged and
+        leave the worker in polling mode; the next processing cycle will try
+        to listen again.
+        """
+        try:
+            self._listener = self.fundermaps.queue.listen(NOTIFY_CHANNEL)
+        except Exception as e:
+            self.logger.error(
+                f"Failed to listen on '{NOTIFY_CHANNEL}', polling only: {e}"
+            )
+            return
+
+        asyncio.get_running_loop().add_reader(
+            self._listener.fileno(), self._on_notification
+        )
+        self.logger.info(f"Listening for job notifications on '{NOTIFY_CHANNEL}'")
+
+    def _stop_listener(self) -> None:
+        """Stop listening for job notifications and close the connection."""
+        if self._listener is None:
+            return
+
+        listener, self._listener = self._listener, None
+        with contextlib.suppress(Exception):
+            asyncio.get_running_loop().remove_reader(listener.fileno())
+        listener.close()
+
+    def _on_notification(self) -> None:
+        """Drain pending notifications and wake up the processing loop."""
+        try:
+            self._listener.poll()
+        except Exception as e:
+            self.logger.warning(f"Job notification connection lost: {e}")
+            self._stop_listener()
+            self._wakeup.set()
+            return
+
+        job_types = self.args.job_types
+        notifies = list(self._listener.notifies)
+        self._listener.notifies.clear()
+        if any(not job_types or n.payload in job_types for n in notifies):
+            self.logger.debug("Received job notification")
+            self._wakeup.set()
+
+    def _request_shutdown(self, signum: int) -> None:
+        """Stop claiming jobs and let the processing loop drain the running ones."""
+        if self._stopping:
+            self.logger.info("Shutdown already in progress")
+            return
+
+        self.logger.info(
+            f"Received {signal.Signals(signum).name}, no longer claiming jobs"
+        )
+        self._stopping = True
+        self._stop_listener()
+        self._wakeup.set()
+
+    async def _drain(self, timeout: float) -> None:
         """
-        Fetch pending jobs from the worker_jobs table.
+        Wait for running jobs to finish and release the ones that do not.
+
+        Jobs still running when the timeout expires are returned to the queue
+        as pending, without counting an attempt, and then cancelled. Another
+        worker picks them up right away instead of after their lease expired.
+
+        Cancelling a job does not stop a blocking stage it runs in the thread
+        pool, e.g. an S3 upload. Such stages are abandoned: the worker exits
+        without waiting for them. Until it does, a released job may run on
+        another worker while its abandoned stage still runs here.
 
         Args:
-            job_types: Optional list of job types to filter by
+            timeout: Maximum time to wait for running jobs in seconds
+        """
+        if not self._running:
+            return
 
-        Returns:
-            List of job dictionaries
+        self.logger.info(
+            f"Waiting up to {timeout}s for {len(self._running)} running job(s) to finish"
+        )
+        _, pending = await asyncio.wait(self._running.values(), timeout=timeout)
+        if not pending:
+            return
+
+        job_ids = [job_id for job_id, task in self._running.items() if task in pending]
+        try:
+            released = await self.run_blocking(self.fundermaps.queue.release, job_ids)
+            self.logger.warning(
+                f"Released {len(released)} unfinished job(s) back to the queue"
+            )
+        except Exception as e:
+            self.logger.error(
+                f"Failed to release jobs {job_ids}, they are reclaimed once"
+                f" their lease expires: {e}"
+            )
+
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        self.fundermaps.abandon_blocking()
+
+    async def _wait_for_jobs(self, timeout: float) -> None:
         """
-        self.logger.debug("Fetching pending jobs")
-        now = datetime.now(UTC)
-
-        with self.fundermaps.db as db, db.db.cursor() as cur:
-            query = """
-                    SELECT
-                        id, job_type, payload, priority, retry_count, max_retries
-                    FROM
-                        application.worker_jobs
-                    WHERE
-                        status = 'pending'
-                        AND (process_after IS NULL OR process_after <= %s)
-                        AND (max_retries = 0 OR retry_count < max_retries)
-                """
-            params = [now]
-
-            if job_types and len(job_types) > 0:
-                placeholders = ", ".join(["%s"] * len(job_types))
-                query += f" AND job_type IN ({placeholders})"
-                params.extend(job_types)
-
-            query += " ORDER BY priority DESC, created_at ASC"
-            cur.execute(query, params)
-
-            # Convert rows to dictionaries
-            columns = [desc[0] for desc in cur.description]
-            return [dict(zip(columns, row, strict=False)) for row in cur.fetchall()]
-
-    async def _mark_job_in_progress(self, job_id: int) -> bool:
+        Sleep until the timeout expires or a job notification arrives.
+
+        Args:
+            timeout: Maximum time to wait in seconds
+        """
+        with contextlib.suppress(TimeoutError):
+            await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+        self._wakeup.clear()
+
+    async def _maintain_leases(self, interval: float) -> None:
         """
-        Mark a job as in progress.
+        Periodically renew leases on running jobs and reclaim expired ones.
+
+        Jobs whose lease could not be renewed have been reclaimed by another
+        worker and are cancelled here to avoid running them twice.
 
         Args:
-            job_id: The ID of the job to update
+            interval: Time between heartbeats in seconds
+        """
+        while True:
+            await asyncio.sleep(interval)
+
+            try:
+                running = list(self._running)
+                renewed = set(
+                    await self.run_blocking(self.fundermaps.queue.heartbeat, running)
+                )
+                for job_id in running:
+                    task = self._running.get(job_id)
+                    if job_id not in renewed and task and not task.done():
+                        self.logger.warning(
+                            f"Lost lease on job {job_id}, cancelling it"
+                        )
+                        task.cancel()
+
+                reclaimed = await self.run_blocking(
+                    self.fundermaps.queue.reclaim_expired
+                )
+                for job_id, status in reclaimed:
+                    self.logger.warning(
+                        f"Reclaimed job {job_id} with an expired lease, now {status}"
+                    )
+                if reclaimed:
+                    self._wakeup.set()
+            except Exception as e:
+                self.logger.error(f"Failed to maintain job leases: {e}")
+
+    async def _collect_metrics(self) -> None:
+        """Sample the queue depth and slot usage for a metrics scrape."""
+        if self._scheduler is not None:
+            self._slots_capacity.set(self._scheduler.capacity)
+            self._slots_in_use.set(self._scheduler.used)
+            self._jobs_running.clear()
+            for job_type, count in self._scheduler.running_by_type().items():
+                self._jobs_running.set(count, job_type=job_type)
+
+        depth = await self.run_blocking(self.fundermaps.queue.depth)
+        self._queue_jobs.clear()
+        for job_type, status, count in depth:
+            self._queue_jobs.set(count, job_type=job_type, status=status)
+
+    async def _claim_jobs(
+        self,
+        limit: int,
+        job_types: list[str] = None,
+        exclude_types: list[str] = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Claim pending jobs from the worker_jobs table.
+
+        Args:
+            limit: Maximum number of jobs to claim
+            job_types: Optional list of job types to filter by
+            exclude_types: Optional list of job types to skip
 
         Returns:
-            True if successful, False otherwise
+            List of claimed job dictionaries
         """
-        self.logger.debug(f"Marking job {job_id} as in-progress")
         try:
-            with self.fundermaps.db as db, db.db.cursor() as cur:
-                query = """
-                        UPDATE application.worker_jobs
-                        SET status = 'processing', updated_at = NOW()
-                        WHERE id = %s AND status = 'pending'
-                        RETURNING id
-                    """
-                cur.execute(query, (job_id,))
-                result = cur.fetchone()
-                db.db.commit()
-                return result is not None
+            return await self.run_blocking(
+                self.fundermaps.queue.claim, limit, job_types, exclude_types
+            )
         except Exception as e:
-            self.logger.error(f"Failed to mark job {job_id} as in-progress: {e}")
-            return False
+            self.logger.error(f"Failed to claim jobs: {e}")
+            return []
 
     async def _mark_job_complete(self, job_id: int) -> None:
         """
@@ -123,20 +389,13 @@ class ProcessWorkerJobsCommand(WorkerCommand):
         """
         self.logger.info(f"Marking job {job_id} as completed")
         try:
-            with self.fundermaps.db as db, db.db.cursor() as cur:
-                query = """
-                        UPDATE application.worker_jobs
-                        SET status = 'completed', updated_at = NOW()
-                        WHERE id = %s
-                    """
-                cur.execute(query, (job_id,))
-                db.db.commit()
+            await self._state_writer.complete(job_id)
         except Exception as e:
             self.logger.error(f"Failed to mark job {job_id} as completed: {e}")
 
     async def _mark_job_failed(
         self, job_id: int, error: str, retry: bool = True
-    ) -> None:
+    ) -> str | None:
         """
         Mark a job as failed, potentially scheduling a retry.
 
@@ -144,65 +403,20 @@ class ProcessWorkerJobsCommand(WorkerCommand):
             job_id: The ID of the job to update
             error: The error message
             retry: Whether to retry the job if retries are available
+
+        Returns:
+            The new job status, or None if the job could not be updated
         """
         self.logger.warning(f"Marking job {job_id} as failed: {error}")
         try:
-            with self.fundermaps.db as db, db.db.cursor() as cur:
-                    # First, get current retry information
-                    cur.execute(
-                        "SELECT retry_count, max_retries FROM application.worker_jobs WHERE id = %s",
-                        (job_id,),
-                    )
-                    result = cur.fetchone()
-                    if not result:
-                        self.logger.error(
-                            f"Job {job_id} not found when updating failure status"
-                        )
-                        return
-
-                    retry_count, max_retries = result
-                    new_retry_count = retry_count + 1
-
-                    # Determine if we can retry
-                    # Can retry if: retry is enabled AND (max_retries is 0 (unlimited) OR retry_count < max_retries)
-                    can_retry = retry and (max_retries == 0 or retry_count < max_retries)
-                    new_status = "pending" if can_retry else "failed"
-
-                    # Calculate next process time if retrying (exponential backoff)
-                    process_after = None
-                    if can_retry:
-                        # Simple exponential backoff: 30s, 2m, 8m, etc.
-                        backoff_seconds = 30 * (2 ** (new_retry_count - 1))
-                        process_after = f"NOW() + INTERVAL '{backoff_seconds} seconds'"
-
-                        if max_retries == 0:
-                            self.logger.info(
-                                f"Scheduling job {job_id} for retry in {backoff_seconds}s (attempt {new_retry_count}, unlimited retries)"
-                            )
-                        else:
-                            self.logger.info(
-                                f"Scheduling job {job_id} for retry in {backoff_seconds}s (attempt {new_retry_count}/{max_retries})"
-                            )
-
-                    # Update the job
-                    query = f"""
-                        UPDATE application.worker_jobs
-                        SET
-                            status = %s,
-                            retry_count = %s,
-                            last_error = %s,
-                            process_after = {process_after if process_after else 'NULL'},
-                            updated_at = NOW()
-                        WHERE id = %s
-                    """  # noqa: S608
-                    cur.execute(query, (new_status, new_retry_count, error, job_id))
-                    db.db.commit()
+            return await self._state_writer.fail(job_id, error, retry)
         except Exception as e:
             self.logger.error(f"Failed to mark job {job_id} as failed: {e}")
+            return None
 
     async def _process_job(self, job: dict[str, Any]) -> bool:
         """
-        Process a single job based on its type.
+        Process a single job with the handler registered for its type.
 
         Args:
             job: The job dictionary
@@ -217,255 +431,163 @@ class ProcessWorkerJobsCommand(WorkerCommand):
         self.logger.info(f"Processing job {job_id} of type {job_type}")
 
         try:
-            # Different job types can be processed differently
-            if job_type == "refresh_models":
-                return await self._process_refresh_models_job(job_id, payload)
-            elif job_type == "load_dataset":
-                return await self._process_load_dataset_job(job_id, payload)
-            elif job_type == "process_mapset":
-                return await self._process_mapset_job(job_id, payload)
-            elif job_type == "cleanup_storage":
-                return await self._process_cleanup_storage_job(job_id, payload)
-            elif job_type == "export_product":
-                return await self._process_export_product_job(job_id, payload)
-            elif job_type == "generate_pdf":
-                return await self._generate_single_pdf(job_id, payload)
-            elif job_type == "send_mail":
-                return await self._process_send_mail_job(job_id, payload)
-            else:
-                raise ValueError(f"Unknown job type: {job_type}")
+            success = await self.registry.run(job_type, payload)
+
+            # A job with dependents is part of a pipeline that already
+            # declares what runs next
+            if success and not job.get("has_dependents"):
+                for follow_up in self.registry.handler(job_type).follow_up:
+                    self.logger.info(
+                        f"Job {job_id} complete, submitting {follow_up} job"
+                    )
+                    await self.run_blocking(self.fundermaps.queue.enqueue, follow_up)
+
+            return success
         except Exception as e:
             self.logger.error(f"Error processing job {job_id}: {e}", exc_info=True)
             return False
 
-    async def _process_refresh_models_job(
-        self, job_id: int, payload: dict[str, Any]
-    ) -> bool:
-        """Process a refresh_models job."""
-        from fundermapsworker.commands.refresh_models import ModelRefreshCommand
-
-        self.logger.info(f"Running refresh_models job {job_id}")
-
-        # Create command arguments
-        args = argparse.Namespace()
-        args.skip_risk = payload.get("skip_risk", False)
-        args.skip_statistics = payload.get("skip_statistics", False)
-        args.view = payload.get("view")
-
-        # Run the command
-        command = ModelRefreshCommand()
-        command.args = args
-        command.fundermaps = self.fundermaps
-        command.logger = self.logger
-
-        success = await command.execute() == 0
-
-        # Chain: automatically run process_mapset after successful refresh
-        if success:
-            self.logger.info("Refresh complete, chaining process_mapset...")
-            success = await self._process_mapset_job(job_id, {})
-
-        return success
-
-    async def _process_load_dataset_job(
-        self, job_id: int, payload: dict[str, Any]
-    ) -> bool:
-        """Process a load_dataset job."""
-        from fundermapsworker.commands.load_dataset import LoadDatasetCommand
-
-        self.logger.info(f"Running load_dataset job {job_id}")
-
-        # Create command arguments
-        args = argparse.Namespace()
-        args.dataset_input = payload.get("dataset_input")
-        if not args.dataset_input:
-            raise ValueError("Missing required field 'dataset_input' in job payload")
-
-        args.layer = payload.get("layer", [])
-        args.delete_after = payload.get("delete_after", False)
-        args.tmp_dir = payload.get("tmp_dir")
-
-        # Run the command
-        command = LoadDatasetCommand()
-        command.args = args
-        command.fundermaps = self.fundermaps
-        command.logger = self.logger
-
-        return await command.execute() == 0
-
-    async def _process_mapset_job(self, job_id: int, payload: dict[str, Any]) -> bool:
-        """Process a process_mapset job."""
-        from fundermapsworker.commands.process_mapset import ProcessMapsetCommand
-
-        self.logger.info(f"Running process_mapset job {job_id}")
-
-        # Create command arguments
-        args = argparse.Namespace()
-        tileset_value = payload.get("tileset")
-        args.tileset = (
-            tileset_value
-            if isinstance(tileset_value, list)
-            else [tileset_value] if tileset_value else []
-        )
-        args.max_workers = payload.get("max_workers", 3)
-
-        # Run the command
-        command = ProcessMapsetCommand()
-        command.args = args
-        command.fundermaps = self.fundermaps
-        command.logger = self.logger
-
-        return await command.execute() == 0
-
-    async def _process_cleanup_storage_job(
-        self, job_id: int, payload: dict[str, Any]
-    ) -> bool:
-        """Process a cleanup_storage job."""
-        from fundermapsworker.commands.cleanup_storage import CleanupStorageCommand
-
-        self.logger.info(f"Running cleanup_storage job {job_id}")
-
-        # Create command arguments (no specific args for this command)
-        args = argparse.Namespace()
-
-        # Run the command
-        command = CleanupStorageCommand()
-        command.args = args
-        command.fundermaps = self.fundermaps
-        command.logger = self.logger
-
-        return await command.execute() == 0
-
-    async def _process_export_product_job(
-        self, job_id: int, payload: dict[str, Any]
-    ) -> bool:
-        """Process an export_product job."""
-        from fundermapsworker.commands.export_product import ProductExportCommand
-
-        self.logger.info(f"Running export_product job {job_id}")
-
-        # Create command arguments
-        args = argparse.Namespace()
-        args.date = payload.get("date")
-
-        # Run the command
-        command = ProductExportCommand()
-        command.args = args
-        command.fundermaps = self.fundermaps
-        command.logger = self.logger
-
-        return await command.execute() == 0
-
-    async def _generate_single_pdf(self, job_id: int, payload: dict[str, Any]) -> bool:
-        """Generate a single PDF from a URL."""
-        from fundermapsworker.commands.generate_pdf import PDFGenerateCommand
-
-        self.logger.info(f"Running generate_pdf job {job_id}")
-
-        # Create command arguments
-        args = argparse.Namespace()
-        args.url = payload.get("url")
-        args.output_dir = "./pdfs" # TODO: This is a hack
-
-        # Run the command
-        command = PDFGenerateCommand()
-        command.args = args
-        command.fundermaps = self.fundermaps
-        command.logger = self.logger
-
-        return await command.execute() == 0
-
-    async def _process_send_mail_job(
-        self, job_id: int, payload: dict[str, Any]
-    ) -> bool:
-        """Process a send_mail job."""
-        from fundermapsworker.commands.send_mail import SendMailCommand
-
-        self.logger.info(f"Running send_mail job {job_id}")
-
-        # Create command arguments
-        args = argparse.Namespace()
-        args.to = payload.get("to")
-        if not args.to:
-            raise ValueError("Missing required field 'to' in job payload")
-
-        args.subject = payload.get("subject")
-        if not args.subject:
-            raise ValueError("Missing required field 'subject' in job payload")
-
-        args.text = payload.get("text")
-        if not args.text:
-            raise ValueError("Missing required field 'text' in job payload")
-
-        # Run the command
-        command = SendMailCommand()
-        command.args = args
-        command.fundermaps = self.fundermaps
-        command.logger = self.logger
+    async def _run_job(self, job: dict[str, Any], timeout: int) -> None:
+        """
+        Run a claimed job with a timeout and record its outcome and timings.
 
-        return await command.execute() == 0
+        Args:
+            job: The claimed job dictionary
+            timeout: Maximum job execution time in seconds
+        """
+        job_id = job["id"]
+        job_type = job["job_type"]
 
-    async def _process_jobs(
+        run = telemetry.JobRun(
+            job_id,
+            job_type,
+            attempt=job["retry_count"] + 1,
+            queue_wait=job["queue_wait"],
+        )
+        status = None
+        outcome = "cancelled"
+        error = None
+        try:
+            with telemetry.job_run(run):
+                success = await asyncio.wait_for(
+                    self._process_job(job), timeout=timeout
+                )
+
+            if success:
+                outcome = "completed"
+                await self._mark_job_complete(job_id)
+            else:
+                outcome = "failed"
+                error = "Job processing returned failure"
+                status = await self._mark_job_failed(job_id, error)
+        except TimeoutError:
+            outcome = "timeout"
+            error = f"Job execution timed out after {timeout} seconds"
+            self.logger.error(f"Job {job_id} timed out after {timeout} seconds")
+            status = await self._mark_job_failed(job_id, error)
+        except Exception as e:
+            outcome = "failed"
+            error = str(e)
+            self.logger.error(f"Error processing job {job_id}: {e}", exc_info=True)
+            status = await self._mark_job_failed(job_id, error)
+        finally:
+            run.finish(outcome, error)
+            self._state_writer.record_run(run)
+
+            self._job_duration.observe(run.run_time, job_type=job_type)
+            self._jobs_finished.inc(job_type=job_type, outcome=outcome)
+            if status == "pending":
+                self._job_retries.inc(job_type=job_type)
+
+    def _on_capacity_change(self, capacity: int) -> None:
+        """Resize the job slots and wake the dispatcher to fill new ones."""
+        self._scheduler.capacity = capacity
+        self._wakeup.set()
+
+    def _on_job_done(self, job: dict[str, Any], task: asyncio.Task) -> None:
+        """Free the job's slots and wake the dispatcher to refill them."""
+        self._running.pop(job["id"], None)
+        self._scheduler.release(job["job_type"])
+        self._wakeup.set()
+
+    async def _dispatch(
         self,
-        semaphore: asyncio.Semaphore,
         job_types: list[str] = None,
         timeout: int = 3600,
-    ) -> None:
+    ) -> int:
         """
-        Process pending jobs with concurrency control.
+        Claim jobs for the free concurrency slots and start them.
+
+        Jobs run as independent tasks; each one frees its slots on completion
+        and wakes the dispatcher, so a long-running job never holds back
+        pickup of other jobs. Per-job-type limits and weights are enforced by
+        the slot scheduler.
 
         Args:
-            semaphore: Semaphore for controlling concurrency
             job_types: Optional list of job types to filter by
             timeout: Maximum job execution time in seconds
-        """
-        jobs = await self._get_pending_jobs(job_types)
-        if not jobs:
-            self.logger.debug("No pending jobs found")
-            return
 
-        self.logger.info(f"Found {len(jobs)} pending job(s)")
+        Returns:
+            The number of jobs started
+        """
+        if self._scheduler.free <= 0:
+            self.logger.debug("All job slots are busy")
+            return 0
 
-        async def process_job_with_semaphore(job):
-            async with semaphore:
-                job_id = job["id"]
+        # A heavy job that does not fit yet keeps lighter jobs from jumping
+        # ahead of it once it is first in line
+        waiting = None
+        if self._scheduler.blocked_types(job_types):
+            try:
+                waiting = await self.run_blocking(
+                    self.fundermaps.queue.next_job_type, job_types
+                )
+            except Exception as e:
+                self.logger.error(f"Failed to look up the next pending job: {e}")
+                return 0
+            if waiting in self._scheduler.blocked_types(job_types):
+                self.logger.debug(
+                    f"Holding {self._scheduler.free} free slot(s) for a pending"
+                    f" {waiting} job"
+                )
+
+        started = 0
+        for request in self._scheduler.claim_requests(job_types, waiting):
+            jobs = await self._claim_jobs(
+                request.limit, request.job_types, request.exclude_types
+            )
 
-                # Try to mark the job as in-progress
-                if not await self._mark_job_in_progress(job_id):
-                    self.logger.warning(
-                        f"Job {job_id} could not be marked as in-progress, skipping"
+            for job in jobs:
+                self._claim_latency.observe(job["queue_wait"], job_type=job["job_type"])
+                if job["coalesced"]:
+                    self._jobs_coalesced.inc(job["coalesced"], job_type=job["job_type"])
+                    self.logger.info(
+                        f"Job {job['id']} coalesced {job['coalesced']} duplicate"
+                        f" {job['job_type']} job(s)"
                     )
-                    return
+                self._scheduler.acquire(job["job_type"])
+                task = asyncio.create_task(self._run_job(job, timeout))
+                self._running[job["id"]] = task
+                task.add_done_callback(functools.partial(self._on_job_done, job))
 
-                # Process the job with timeout
-                try:
-                    # Create a task with timeout
-                    process_task = asyncio.create_task(self._process_job(job))
-                    success = await asyncio.wait_for(process_task, timeout=timeout)
-
-                    if success:
-                        await self._mark_job_complete(job_id)
-                    else:
-                        await self._mark_job_failed(
-                            job_id, "Job processing returned failure"
-                        )
-                except TimeoutError:
-                    self.logger.error(f"Job {job_id} timed out after {timeout} seconds")
-                    await self._mark_job_failed(
-                        job_id, f"Job execution timed out after {timeout} seconds"
-                    )
-                except Exception as e:
-                    self.logger.error(
-                        f"Error processing job {job_id}: {e}", exc_info=True
-                    )
-                    await self._mark_job_failed(job_id, str(e))
+            started += len(jobs)
 
-        # Create tasks for all jobs
-        tasks = [process_job_with_semaphore(job) for job in jobs]
-        await asyncio.gather(*tasks)
+        if not started:
+            self.logger.debug("No pending jobs found")
+            return 0
+
+        self.logger.info(
+            f"Claimed {started} pending job(s), "
+            f"{self._scheduler.used}/{self._scheduler.capacity} slots in use"
+        )
+        return started
 
     async def execute(self) -> int:
         """Execute the process worker jobs command."""
+        lease_task = None
+        load_task = None
+        metrics_server = None
+        loop = asyncio.get_running_loop()
         try:
             poll_interval = self.args.poll_interval
             job_types = self.args.job_types if self.args.job_types else None
@@ -473,46 +595,116 @@ class ProcessWorkerJobsCommand(WorkerCommand):
             run_once = self.args.run_once
             timeout = self.args.timeout
 
-            semaphore = asyncio.Semaphore(max_concurrent)
+            self._wakeup = asyncio.Event()
+            try:
+                self._scheduler = SlotScheduler(max_concurrent, self.args.job_class)
+            except ValueError as e:
+                self.logger.error(str(e))
+                return 1
+            self._state_writer = JobStateWriter(
+                self.fundermaps.queue, self.run_blocking
+            )
+
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                loop.add_signal_handler(signum, self._request_shutdown, signum)
+
+            if self.args.adaptive:
+                # Never shrink below the heaviest job class, or its jobs could
+                # not be claimed until the host load drops again
+                min_concurrent = max(
+                    min(self.args.min_concurrent, max_concurrent),
+                    self._scheduler.max_weight,
+                )
+                controller = HostLoadController(min_concurrent, max_concurrent)
+                controller.logger = self.logger
+                self._scheduler.capacity = controller.limit
+                load_task = asyncio.create_task(
+                    controller.run(on_change=self._on_capacity_change)
+                )
+
+            self.fundermaps.queue.lease_duration = self.args.lease_duration
+            lease_task = asyncio.create_task(
+                self._maintain_leases(self.args.lease_duration / 3)
+            )
+
+            if self.args.metrics_port:
+                metrics_server = await self.metrics.serve(
+                    self.args.metrics_host, self.args.metrics_port
+                )
+                self.logger.info(
+                    f"Serving metrics on {self.args.metrics_host}:{self.args.metrics_port}"
+                )
 
             self.logger.info(
                 f"Starting worker job processor with poll interval of {poll_interval}s"
                 f" and max concurrency of {max_concurrent}"
             )
+            if self.args.adaptive:
+                self.logger.info(
+                    f"Adapting concurrency to host load, starting at"
+                    f" {self._scheduler.capacity}"
+                )
             if job_types:
                 self.logger.info(f"Processing only job types: {', '.join(job_types)}")
-
-            # Main processing loop
-            while True:
+            for job_class in self.args.job_class:
+                self.logger.info(
+                    f"Job type {job_class.job_type}: limit {job_class.limit},"
+                    f" weight {job_class.weight}"
+                )
+
+            # Main dispatch loop: refill free slots whenever a job finishes,
+            # a notification arrives or the poll interval expires
+            while not self._stopping:
                 try:
-                    start_time = time.time()
-                    await self._process_jobs(semaphore, job_types, timeout)
-                    elapsed = time.time() - start_time
+                    if self.args.listen and self._listener is None and not run_once:
+                        self._start_listener()
+
+                    await self._dispatch(job_types, timeout)
 
                     if run_once:
-                        self.logger.info("Run-once mode enabled, exiting")
-                        return 0
-
-                    # Adjust sleep time to maintain consistent polling interval
-                    sleep_time = max(0.1, poll_interval - elapsed)
-                    if sleep_time < poll_interval:
-                        self.logger.debug(
-                            f"Processing took {elapsed:.2f}s, sleeping for {sleep_time:.2f}s"
-                        )
+                        # Finished jobs and shutdown signals both wake us up
+                        while self._running and not self._stopping:
+                            await self._wait_for_jobs(poll_interval)
+                        break
 
-                    await asyncio.sleep(sleep_time)
+                    await self._wait_for_jobs(poll_interval)
                 except Exception as e:
                     self.logger.error(f"Error in processing cycle: {e}", exc_info=True)
                     await asyncio.sleep(poll_interval)
 
+            await self._drain(self.args.drain_timeout)
+
+            if run_once and not self._stopping:
+                self.logger.info("Run-once mode enabled, exiting")
+            else:
+                self.logger.info("Worker stopped")
+            return 0
+
         except KeyboardInterrupt:
             self.logger.info("Received keyboard interrupt, shutting down")
             return 0
         except Exception as e:
             self.logger.error(f"An error occurred: {e}", exc_info=True)
             return 1
+        finally:
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                loop.remove_signal_handler(signum)
+            self._stop_listener()
+            if self._state_writer is not None:
+                await self._state_writer.close()
+            if lease_task is not None:
+                lease_task.cancel()
+            if load_task is not None:
+                load_task.cancel()
+            if metrics_server is not None:
+                metrics_server.close()
 
 
 if __name__ == "__main__":
-    exit_code = asyncio.run(ProcessWorkerJobsCommand().run())
+    command = ProcessWorkerJobsCommand()
+    exit_code = asyncio.run(command.run())
+    if command.fundermaps is not None and command.fundermaps.blocking_abandoned:
+        # Do not join the threads of blocking stages abandoned by the drain
+        logging.shutdown()
+        os._exit(exit_code)
     exit(exit_code)
@@ -29,16 +29,16 @@ async def run(fundermaps: FunderMapsSDK, args):
 
     with fundermaps.db as db:
         logger.info("Preparing BAG staging tables")
-        db.execute_script("prepare_bag")
+        db.execute_script("load/prepare_bag")
 
         logger.info("Loading buildings into geocoder")
-        db.execute_script("load_building")
+        db.execute_script("load/load_building")
         db.reindex_table("geocoder.building")
 
         logger.info("Loading addressess into geocoder")
-        db.execute_script("load_address")
+        db.execute_script("load/load_address")
         db.reindex_table("geocoder.address")
 
         logger.info("Loading residences into geocoder")
-        db.execute_script("load_residence")
+        db.execute_script("load/load_residence")
         db.reindex_table("geocoder.residence")
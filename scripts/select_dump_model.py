@@ -27,37 +27,22 @@ async def run(fundermaps: FunderMapsSDK, args):
             # TODO: Run everything in a transaction
             db.truncate_table("public.model_supply")
 
-            with db.db.cursor() as cur:
-                for row in reader:
-                    if len(row[0]) == 16:
-                        # TODO: Use copy
-                        insert_query = (
-                            "INSERT INTO model_supply (building_id) VALUES (%s)"
-                        )
-                        building_id = f"NL.IMBAG.PAND.{row[0]}"
-                        cur.execute(insert_query, (building_id,))
-
-            with db.db.cursor() as cur:
-                # Load from script
-                query = """
-                    SELECT *
-                    FROM public.model_supply ms
-                    JOIN data.model_risk_static mrs ON mrs.external_building_id = ms.building_id"""
-
-                cur.execute(query)
-
-                csv_file = "model_supply.csv"
-
-                column_names = [desc[0] for desc in cur.description]
-
-                logger.info(f"Writing data to {csv_file}")
-                with Path(csv_file).open(mode="w", newline="") as file:
-                    writer = csv.writer(file)
-
-                    writer.writerow(column_names)
-
-                    for row in cur:
-                        writer.writerow(row)
+            db.copy_in(
+                "public.model_supply",
+                ((f"NL.IMBAG.PAND.{row[0]}",) for row in reader if len(row[0]) == 16),
+                columns=("building_id",),
+            )
+
+            # Load from script
+            query = """
+                SELECT *
+                FROM public.model_supply ms
+                JOIN data.model_risk_static mrs ON mrs.external_building_id = ms.building_id"""
+
+            csv_file = "model_supply.csv"
+
+            logger.info(f"Writing data to {csv_file}")
+            db.copy_out(query, csv_file)
 
         with fundermaps.s3 as s3:
             logger.info(f"Uploading {csv_file} to S3")
@@ -7,6 +7,8 @@
 -- - Ground level — from building_elevation
 --
 -- Only needs refreshing after BAG reload (quarterly), NOT on every risk refresh.
+--
+-- Run this file idempotently: CREATE OR REPLACE / IF NOT EXISTS throughout.
 
 -- Create table if not exists (idempotent)
 CREATE TABLE IF NOT EXISTS data.building_precomputed (
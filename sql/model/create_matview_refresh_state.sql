@@ -0,0 +1,159 @@
+-- Change-aware materialized view refresh
+--
+-- Used by data.refresh_all() and refresh_models.py to skip refreshing
+-- materialized views whose source tables have not changed since their last
+-- refresh.
+--
+-- Run this file idempotently: CREATE OR REPLACE / IF NOT EXISTS throughout.
+
+--------------------------------------------------------------------------------
+-- Refresh state
+--------------------------------------------------------------------------------
+
+-- One row per materialized view refreshed through
+-- data.refresh_matview_if_changed(), holding the fingerprint of its sources at
+-- the time of its last refresh.
+CREATE TABLE IF NOT EXISTS data.matview_refresh_state (
+    view_name text PRIMARY KEY,
+    source_fingerprint text,
+    refreshed_at timestamptz NOT NULL,
+    checked_at timestamptz NOT NULL
+);
+
+--------------------------------------------------------------------------------
+-- Source fingerprint
+--------------------------------------------------------------------------------
+
+-- Fingerprint of the relations a materialized view reads from. Sources are
+-- found through the view's rewrite rule dependencies, looking through plain
+-- views and into inheritance children such as partitions and hypertable
+-- chunks. Every source contributes its relfilenode, which changes on TRUNCATE
+-- and non-concurrent refreshes, and:
+--
+--   * for materialized views refreshed through data.refresh_matview_if_changed(),
+--     their last refresh from data.matview_refresh_state
+--   * for other relations, their insert/update/delete counters, including
+--     the writes of the current transaction, which are not in
+--     pg_stat_all_tables until it ends
+--
+-- Statistics counters only grow, or reset to zero, so any write produces a
+-- different fingerprint. Counters lag writes committed by other sessions by
+-- up to a second; writes in that window are seen by the next refresh. Tables
+-- only read by functions the view calls are not found; views without any
+-- other sources are always refreshed (the fingerprint is NULL).
+CREATE OR REPLACE FUNCTION data.matview_source_fingerprint(matview regclass)
+RETURNS text
+LANGUAGE sql STABLE
+AS $$
+    WITH RECURSIVE sources (relid) AS (
+        SELECT dep.refobjid
+        FROM pg_rewrite AS rule
+        JOIN pg_depend AS dep
+            ON dep.classid = 'pg_rewrite'::regclass AND dep.objid = rule.oid
+        WHERE
+            rule.ev_class = matview
+            AND dep.refclassid = 'pg_class'::regclass
+            AND dep.refobjid <> matview
+        UNION
+        SELECT nested.relid
+        FROM sources
+        JOIN pg_class AS rel ON rel.oid = sources.relid
+        CROSS JOIN LATERAL (
+            SELECT dep.refobjid
+            FROM pg_rewrite AS rule
+            JOIN pg_depend AS dep
+                ON dep.classid = 'pg_rewrite'::regclass AND dep.objid = rule.oid
+            WHERE
+                rel.relkind = 'v'
+                AND rule.ev_class = rel.oid
+                AND dep.refclassid = 'pg_class'::regclass
+                AND dep.refobjid <> rel.oid
+            UNION ALL
+            SELECT inh.inhrelid
+            FROM pg_inherits AS inh
+            WHERE inh.inhparent = rel.oid
+        ) AS nested (relid)
+    )
+    SELECT md5(
+        matview::oid || '|' || string_agg(
+            concat_ws(
+                ':',
+                rel.oid,
+                rel.relfilenode,
+                CASE
+                    WHEN state.refreshed_at IS NOT NULL THEN state.refreshed_at::text
+                    ELSE concat_ws(
+                        ':',
+                        COALESCE(stat.n_tup_ins, 0) + COALESCE(xact.n_tup_ins, 0),
+                        COALESCE(stat.n_tup_upd, 0) + COALESCE(xact.n_tup_upd, 0),
+                        COALESCE(stat.n_tup_del, 0) + COALESCE(xact.n_tup_del, 0)
+                    )
+                END
+            ),
+            ',' ORDER BY rel.oid
+        )
+    )
+    FROM sources
+    JOIN pg_class AS rel ON rel.oid = sources.relid
+    JOIN pg_namespace AS nsp ON nsp.oid = rel.relnamespace
+    LEFT JOIN pg_stat_all_tables AS stat ON stat.relid = rel.oid
+    LEFT JOIN pg_stat_xact_all_tables AS xact ON xact.relid = rel.oid
+    LEFT JOIN data.matview_refresh_state AS state
+        ON state.view_name = format('%I.%I', nsp.nspname, rel.relname)
+    WHERE rel.relkind IN ('r', 'm', 'p');
+$$;
+
+--------------------------------------------------------------------------------
+-- Conditional refresh
+--------------------------------------------------------------------------------
+
+-- Refresh a materialized view concurrently, unless its source fingerprint is
+-- unchanged since its last refresh through this function. The fingerprint is
+-- taken before refreshing, so writes racing the refresh cause another refresh
+-- next time rather than being missed.
+--
+-- Returns true if the view was refreshed, false if it was skipped.
+CREATE OR REPLACE FUNCTION data.refresh_matview_if_changed(
+    matview regclass,
+    force boolean DEFAULT false
+)
+RETURNS boolean
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    matview_name text;
+    fingerprint text := data.matview_source_fingerprint(matview);
+BEGIN
+    SELECT format('%I.%I', nsp.nspname, rel.relname)
+    INTO matview_name
+    FROM pg_class AS rel
+    JOIN pg_namespace AS nsp ON nsp.oid = rel.relnamespace
+    WHERE rel.oid = matview;
+
+    IF NOT force AND fingerprint IS NOT NULL AND EXISTS (
+        SELECT 1
+        FROM data.matview_refresh_state
+        WHERE view_name = matview_name AND source_fingerprint = fingerprint
+    ) THEN
+        UPDATE data.matview_refresh_state
+        SET checked_at = NOW()
+        WHERE view_name = matview_name;
+
+        RAISE NOTICE 'Skipped refresh of %: sources unchanged', matview_name;
+        RETURN false;
+    END IF;
+
+    EXECUTE format('REFRESH MATERIALIZED VIEW CONCURRENTLY %s', matview);
+
+    INSERT INTO data.matview_refresh_state
+        (view_name, source_fingerprint, refreshed_at, checked_at)
+    VALUES (matview_name, fingerprint, NOW(), NOW())
+    ON CONFLICT (view_name) DO UPDATE
+    SET
+        source_fingerprint = EXCLUDED.source_fingerprint,
+        refreshed_at = EXCLUDED.refreshed_at,
+        checked_at = EXCLUDED.checked_at;
+
+    RETURN true;
+END;
+$$;
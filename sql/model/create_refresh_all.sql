@@ -9,15 +9,25 @@
 --   3. Reindex model_risk_static
 --   4. Refresh all 12 statistics matviews
 --   5. Submit process_mapset job to worker queue (tile generation)
+--
+-- Matviews whose source tables did not change since their last refresh are
+-- skipped, see create_matview_refresh_state.sql (run that file first).
+-- CALL data.refresh_all(force => true) refreshes every matview regardless.
+--
+-- Run this file idempotently: DROP IF EXISTS / CREATE OR REPLACE.
+
+-- Replaces the earlier refresh_all() without parameters, which would make
+-- CALL data.refresh_all() ambiguous
+DROP PROCEDURE IF EXISTS data.refresh_all();
 
-CREATE OR REPLACE PROCEDURE data.refresh_all()
+CREATE OR REPLACE PROCEDURE data.refresh_all(force boolean DEFAULT false)
 LANGUAGE plpgsql
 AS $$
 BEGIN
     -- Step 1: Refresh sample matviews
-    REFRESH MATERIALIZED VIEW CONCURRENTLY data.building_sample;
-    REFRESH MATERIALIZED VIEW CONCURRENTLY data.cluster_sample;
-    REFRESH MATERIALIZED VIEW CONCURRENTLY data.supercluster_sample;
+    PERFORM data.refresh_matview_if_changed('data.building_sample', force);
+    PERFORM data.refresh_matview_if_changed('data.cluster_sample', force);
+    PERFORM data.refresh_matview_if_changed('data.supercluster_sample', force);
 
     -- Step 2: Run risk model manifest (INSERT ON CONFLICT into model_risk_static)
     CALL data.model_risk_manifest();
@@ -26,18 +36,18 @@ BEGIN
     REINDEX TABLE data.model_risk_static;
 
     -- Step 4: Refresh statistics matviews
-    REFRESH MATERIALIZED VIEW CONCURRENTLY data.statistics_product_inquiries;
-    REFRESH MATERIALIZED VIEW CONCURRENTLY data.statistics_product_inquiry_municipality;
-    REFRESH MATERIALIZED VIEW CONCURRENTLY data.statistics_product_incidents;
-    REFRESH MATERIALIZED VIEW CONCURRENTLY data.statistics_product_incident_municipality;
-    REFRESH MATERIALIZED VIEW CONCURRENTLY data.statistics_product_foundation_type;
-    REFRESH MATERIALIZED VIEW CONCURRENTLY data.statistics_product_foundation_risk;
-    REFRESH MATERIALIZED VIEW CONCURRENTLY data.statistics_product_data_collected;
-    REFRESH MATERIALIZED VIEW CONCURRENTLY data.statistics_product_construction_years;
-    REFRESH MATERIALIZED VIEW CONCURRENTLY data.statistics_product_buildings_restored;
-    REFRESH MATERIALIZED VIEW CONCURRENTLY data.statistics_postal_code_foundation_type;
-    REFRESH MATERIALIZED VIEW CONCURRENTLY data.statistics_postal_code_foundation_risk;
-    REFRESH MATERIALIZED VIEW CONCURRENTLY data.statistics_postal_code_data_collected;
+    PERFORM data.refresh_matview_if_changed('data.statistics_product_inquiries', force);
+    PERFORM data.refresh_matview_if_changed('data.statistics_product_inquiry_municipality', force);
+    PERFORM data.refresh_matview_if_changed('data.statistics_product_incidents', force);
+    PERFORM data.refresh_matview_if_changed('data.statistics_product_incident_municipality', force);
+    PERFORM data.refresh_matview_if_changed('data.statistics_product_foundation_type', force);
+    PERFORM data.refresh_matview_if_changed('data.statistics_product_foundation_risk', force);
+    PERFORM data.refresh_matview_if_changed('data.statistics_product_data_collected', force);
+    PERFORM data.refresh_matview_if_changed('data.statistics_product_construction_years', force);
+    PERFORM data.refresh_matview_if_changed('data.statistics_product_buildings_restored', force);
+    PERFORM data.refresh_matview_if_changed('data.statistics_postal_code_foundation_type', force);
+    PERFORM data.refresh_matview_if_changed('data.statistics_postal_code_foundation_risk', force);
+    PERFORM data.refresh_matview_if_changed('data.statistics_postal_code_data_collected', force);
 
     -- Step 5: Submit process_mapset job to worker queue
     INSERT INTO application.worker_jobs (job_type, status) VALUES ('process_mapset', 'pending');
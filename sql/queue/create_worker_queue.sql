@@ -0,0 +1,183 @@
+-- Worker Job Queue: triggers, columns and indexes on application.worker_jobs
+--
+-- Used by process_worker_jobs.py and fundermapsworker/providers/queue.py.
+--
+-- Run this file idempotently: CREATE OR REPLACE / IF NOT EXISTS throughout.
+
+--------------------------------------------------------------------------------
+-- Job notifications
+--------------------------------------------------------------------------------
+
+-- NOTIFY listening workers (process_worker_jobs.py --listen) when a job becomes
+-- available, so they wake up immediately instead of waiting for the next poll.
+-- The payload is the job type; pg_notify collapses duplicate payloads within a
+-- transaction, so bulk inserts produce one notification per job type.
+CREATE OR REPLACE FUNCTION application.worker_jobs_notify()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM pg_notify('worker_jobs', NEW.job_type);
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS worker_jobs_notify ON application.worker_jobs;
+CREATE TRIGGER worker_jobs_notify
+    AFTER INSERT ON application.worker_jobs
+    FOR EACH ROW
+    WHEN (NEW.status = 'pending')
+    EXECUTE FUNCTION application.worker_jobs_notify();
+
+--------------------------------------------------------------------------------
+-- Job leases
+--------------------------------------------------------------------------------
+
+-- A claimed job is leased to one worker (claimed_by) until lease_expires_at.
+-- Workers renew the lease with a heartbeat while the job runs; jobs whose lease
+-- expired because the worker crashed are returned to 'pending' by any other
+-- worker, following the regular retry/backoff rules.
+ALTER TABLE application.worker_jobs
+    ADD COLUMN IF NOT EXISTS claimed_by text,
+    ADD COLUMN IF NOT EXISTS lease_expires_at timestamptz;
+
+CREATE INDEX IF NOT EXISTS worker_jobs_lease_expires_at_idx
+    ON application.worker_jobs (lease_expires_at)
+    WHERE status = 'processing';
+
+-- Jobs claimed before leases existed have no lease and would never be
+-- reclaimed. Workers of the previous version may still be running them during
+-- a rolling deploy and do not renew leases, so give them a lease generous
+-- enough for any job to finish; only jobs that really stalled expire.
+UPDATE application.worker_jobs
+SET lease_expires_at = NOW() + INTERVAL '6 hours'
+WHERE status = 'processing' AND lease_expires_at IS NULL;
+
+--------------------------------------------------------------------------------
+-- Job coalescing
+--------------------------------------------------------------------------------
+
+-- Pending jobs with the same type and payload are equivalent. When a worker
+-- claims one of them, it claims the others as followers (coalesced_into points
+-- at the job that runs) and they complete or fail together. A NULL payload and
+-- an empty payload are treated as the same.
+ALTER TABLE application.worker_jobs
+    ADD COLUMN IF NOT EXISTS coalesce_key text GENERATED ALWAYS AS (
+        job_type || ':' || md5(COALESCE(payload::jsonb, '{}'::jsonb)::text)
+    ) STORED,
+    ADD COLUMN IF NOT EXISTS coalesced_into bigint;
+
+CREATE INDEX IF NOT EXISTS worker_jobs_coalesce_key_idx
+    ON application.worker_jobs (coalesce_key)
+    WHERE status = 'pending';
+
+CREATE INDEX IF NOT EXISTS worker_jobs_coalesced_into_idx
+    ON application.worker_jobs (coalesced_into)
+    WHERE coalesced_into IS NOT NULL;
+
+--------------------------------------------------------------------------------
+-- Job run telemetry
+--------------------------------------------------------------------------------
+
+-- One row per job run, written by the worker when the run ends. stages holds
+-- the named stages of the run as [{name, offset, duration, bytes}], with times
+-- in seconds. Retried jobs have a row per attempt.
+CREATE TABLE IF NOT EXISTS application.worker_job_runs (
+    id bigint GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    job_id bigint NOT NULL REFERENCES application.worker_jobs (id) ON DELETE CASCADE,
+    job_type text NOT NULL,
+    attempt integer NOT NULL,
+    worker text NOT NULL,
+    started_at timestamptz NOT NULL,
+    queue_wait double precision,
+    run_time double precision NOT NULL,
+    exit_reason text NOT NULL,
+    error text,
+    bytes_moved bigint NOT NULL DEFAULT 0,
+    stages jsonb NOT NULL DEFAULT '[]'
+);
+
+CREATE INDEX IF NOT EXISTS worker_job_runs_job_id_idx
+    ON application.worker_job_runs (job_id);
+
+CREATE INDEX IF NOT EXISTS worker_job_runs_job_type_started_at_idx
+    ON application.worker_job_runs (job_type, started_at);
+
+--------------------------------------------------------------------------------
+-- Priority aging
+--------------------------------------------------------------------------------
+
+-- Pending jobs are claimed in ascending rank. The rank ages a job's priority
+-- by its waiting time: every 15 minutes a job waits counts as one priority
+-- level, so low priority jobs are eventually claimed even while high priority
+-- jobs keep arriving. Ordering by
+--
+--     priority + (now - created_at) / 15 minutes   DESC
+--
+-- is the same as ordering by created_at - priority * 15 minutes ASC, which
+-- does not depend on the current time and can therefore be indexed.
+CREATE OR REPLACE FUNCTION application.worker_job_rank(created_at timestamptz, priority integer)
+RETURNS double precision
+LANGUAGE sql
+IMMUTABLE
+PARALLEL SAFE
+AS $$
+    SELECT (
+        EXTRACT(EPOCH FROM created_at - TIMESTAMPTZ '2000-01-01 00:00:00+00')
+        - COALESCE(priority, 0) * 900
+    )::double precision;
+$$;
+
+CREATE INDEX IF NOT EXISTS worker_jobs_pending_rank_idx
+    ON application.worker_jobs (application.worker_job_rank(created_at, priority))
+    WHERE status = 'pending';
+
+--------------------------------------------------------------------------------
+-- Job dependencies
+--------------------------------------------------------------------------------
+
+-- A job that lists other jobs in depends_on is only claimed once all of them
+-- completed, so jobs form a graph in which independent branches run
+-- concurrently, on any worker. When a job completes, workers listening for
+-- the job types of its dependents are notified; when a job fails for good,
+-- its dependents fail with it, which cascades down the graph.
+ALTER TABLE application.worker_jobs
+    ADD COLUMN IF NOT EXISTS depends_on bigint[];
+
+CREATE INDEX IF NOT EXISTS worker_jobs_depends_on_idx
+    ON application.worker_jobs USING gin (depends_on)
+    WHERE status = 'pending';
+
+CREATE OR REPLACE FUNCTION application.worker_jobs_release_dependents()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF NEW.status = 'completed' THEN
+        PERFORM pg_notify('worker_jobs', dependent.job_type)
+        FROM application.worker_jobs AS dependent
+        WHERE dependent.depends_on @> ARRAY[NEW.id::bigint]
+            AND dependent.status = 'pending';
+    ELSE
+        UPDATE application.worker_jobs
+        SET
+            status = 'failed',
+            last_error = 'Dependency ' || NEW.id || ' (' || NEW.job_type || ') failed',
+            updated_at = NOW()
+        WHERE depends_on @> ARRAY[NEW.id::bigint]
+            AND status = 'pending';
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS worker_jobs_release_dependents ON application.worker_jobs;
+CREATE TRIGGER worker_jobs_release_dependents
+    AFTER UPDATE OF status ON application.worker_jobs
+    FOR EACH ROW
+    WHEN (
+        NEW.status IN ('completed', 'failed')
+        AND OLD.status IS DISTINCT FROM NEW.status
+    )
+    EXECUTE FUNCTION application.worker_jobs_release_dependents();